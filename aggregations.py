@@ -0,0 +1,156 @@
+"""Page datasets computed from the sales cube.
+
+Nothing here touches Streamlit, so the dashboard and the batch report
+(report.py) build exactly the same tables.
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import rollup
+from metadata import eligible_rep_mask, event_sort_keys
+from pacing import pacing
+from timeseries import rep_series
+
+# Reps shown individually in the stacked distribution; the rest become OTHER_REPS
+MAX_STACKED_REPS = 12
+OTHER_REPS = 'Other reps'
+
+REP_SERIES_LABELS = {'block_full_price': 'Total Sales', 'orders': 'Total Orders', 'num_seats': 'Total Tickets Sold'}
+
+
+def mean_sales_curve(cube):
+    """Mean cumulative sales by days before the game over the games already played."""
+    curves = pacing(cube)['curves'].sort_values(by='days_difference', ascending=False)
+    return curves[['days_difference', 'Mean']].rename(columns={'Mean': 'Cumulative Mean Sales'})
+
+
+def event_names(cube):
+    return sorted(cube['cells']['event_name_display'].unique())
+
+
+def sorted_events(cube):
+    # Listed games in registry order, then any unlisted event codes
+    labels = pd.Index(cube['cells']['event_name_display'].unique()).astype(str)
+    return labels[np.argsort(event_sort_keys(labels), kind='stable')].tolist()
+
+
+def eligible_reps(cube):
+    # Rep rules (minimum ticket rows, exclusions) come from the metadata registry
+    rows_by_rep = rollup(cube, ['acct_rep_full_name'])
+    eligible = eligible_rep_mask(rows_by_rep['acct_rep_full_name'].astype(str), rows_by_rep['rows'])
+    return rows_by_rep.loc[eligible, 'acct_rep_full_name'].tolist()
+
+
+def event_time_series(cube, event_name, approx_error=None):
+    """Sales, orders and tickets by days before the game, with running totals."""
+    event_series = rollup(cube, ['days_difference'], where={'event_name_display': event_name}, approx_error=approx_error)
+    # Furthest out first; each series is built straight from the rolled-up columns
+    order = np.argsort(event_series['days_difference'].to_numpy(), kind='stable')[::-1]
+    days = event_series['days_difference'].to_numpy()[order]
+
+    def series(column, label, cumulative_label):
+        values = event_series[column].to_numpy()[order]
+        return pd.DataFrame({'Days Difference': days, label: values, cumulative_label: values.cumsum()},
+                            index=order)
+
+    time_series_sales = series('block_full_price', 'Total Sales', 'Cumulative Sales')
+    time_series_orders = series('orders', 'Total Orders', 'Cumulative Orders')
+    time_series_tickets = series('num_seats', 'Total Tickets Sold', 'Cumulative Tickets Sold')
+
+    return time_series_sales, time_series_orders, time_series_tickets
+
+
+def rep_time_series(cube, sales_rep, approx_error=None, resolution='Daily'):
+    """Sales, orders and tickets for one rep over their full sale-date range.
+
+    Returns None when the rep has no sales.
+    """
+    series = rep_series(cube, resolution, approx_error)
+    row = series['reps'].get_indexer([sales_rep])[0]
+    active = np.flatnonzero(series['rows'][row]) if row >= 0 else []
+    if not len(active):
+        return None
+
+    window = slice(active[0], active[-1] + 1)
+    return tuple(pd.DataFrame({'Date': series['dates'][window], label: series[column][row, window]})
+                 for column, label in REP_SERIES_LABELS.items())
+
+
+def rep_comparison(cube, reps, column, approx_error=None, resolution='Weekly'):
+    """``column`` for each of ``reps`` on the shared date axis, in long format."""
+    series = rep_series(cube, resolution, approx_error)
+    rows = series['reps'].get_indexer(reps)
+    rows = rows[rows >= 0]
+    n_dates = len(series['dates'])
+    return pd.DataFrame({
+        'Date': np.tile(series['dates'], len(rows)),
+        'acct_rep_full_name': np.repeat(series['reps'][rows], n_dates),
+        REP_SERIES_LABELS[column]: series[column][rows].ravel(),
+    })
+
+
+def game_totals(cube, approx_error=None):
+    """Sales, orders and tickets per game, in schedule order."""
+    totals = rollup(cube, ['event_name_display'], approx_error=approx_error)
+    totals = totals.rename(columns={'orders': 'total_orders'})
+    totals = totals.iloc[np.argsort(event_sort_keys(totals['event_name_display']), kind='stable')]
+    return totals[['event_name_display', 'block_full_price', 'total_orders', 'num_seats']]
+
+
+def rep_totals(cube, reps, approx_error=None):
+    """Sales, orders and tickets for each of ``reps``."""
+    totals = rollup(cube, ['acct_rep_full_name'], approx_error=approx_error)
+    totals = totals[totals['acct_rep_full_name'].isin(reps)].rename(columns={'orders': 'total_orders'})
+    return totals[['acct_rep_full_name', 'block_full_price', 'total_orders', 'num_seats']]
+
+
+def sales_distribution(cube, reps):
+    """Each rep's sales and share of sales for every game."""
+    distribution = rollup(cube, ['event_name_display', 'acct_rep_full_name'], where={'acct_rep_full_name': reps})
+    distribution = distribution[['event_name_display', 'acct_rep_full_name', 'block_full_price']]
+
+    # Calculate percentage of sales for each rep for each game
+    game_sales = distribution.groupby('event_name_display', observed=True)['block_full_price'].transform('sum')
+    distribution['sales_percentage'] = distribution['block_full_price'] / game_sales * 100
+    return distribution
+
+
+def stacked_distribution(distribution, max_reps=MAX_STACKED_REPS):
+    """The sales distribution pre-stacked for charting.
+
+    Reps outside the top ``max_reps`` by total sales are folded into one
+    'Other reps' segment per game, so the chart has at most
+    games x (max_reps + 1) rows. Each game's segments run largest first
+    from share_start to share_end (fractions of the game's sales).
+    """
+    top_reps = distribution.groupby('acct_rep_full_name', observed=True)['block_full_price'].sum().nlargest(max_reps).index
+    reps = distribution['acct_rep_full_name'].astype(str).where(distribution['acct_rep_full_name'].isin(top_reps), OTHER_REPS)
+    stacked = distribution.assign(acct_rep_full_name=reps).groupby(
+        ['event_name_display', 'acct_rep_full_name'], observed=True, as_index=False)[['block_full_price', 'sales_percentage']].sum()
+
+    stacked = stacked.sort_values(['event_name_display', 'sales_percentage'], ascending=[True, False], ignore_index=True)
+    share = stacked['sales_percentage'] / 100
+    stacked['share_end'] = share.groupby(stacked['event_name_display'], observed=True).cumsum()
+    stacked['share_start'] = stacked['share_end'] - share
+    return stacked
+
+
+def top_rep_per_game(distribution):
+    top_salesman_per_game = distribution.loc[distribution.groupby('event_name_display', observed=True)['block_full_price'].idxmax()]
+    top_salesman_table = top_salesman_per_game[['event_name_display', 'acct_rep_full_name']]
+    top_salesman_table.columns = ['Game', 'Top Rep']
+    return top_salesman_table.reset_index(drop=True)
+
+
+def summary_tables(cube):
+    """The cumulative tables the pages show, by name: game and rep totals,
+    the sales distribution and the top rep per game."""
+    reps = eligible_reps(cube)
+    distribution = sales_distribution(cube, reps)
+    return {
+        'game_totals': game_totals(cube),
+        'rep_totals': rep_totals(cube, reps),
+        'sales_distribution': distribution,
+        'top_rep_per_game': top_rep_per_game(distribution),
+    }
@@ -0,0 +1,202 @@
+"""Read-only HTTP API and bulk export for the dashboard's summary tables.
+
+Usage:
+    python api.py --port 8502
+    python api.py --partitions partitions --season 2024
+
+Endpoints:
+    GET /tables                      data version and the tables available
+    GET /tables/<name>?format=json   one table as JSON records, CSV or Parquet
+    GET /export?format=csv           every table in one zip (CSV or Parquet)
+
+The tables are the ones the cumulative pages show: game_totals,
+rep_totals, sales_distribution and top_rep_per_game. They are read from
+the same refreshed store and shared copy as the dashboard, and built once
+per data version in the chart cache. Every response carries the data
+version as its ETag, so pollers send If-None-Match and get a bodiless 304
+until the data changes. CSV is streamed in chunks.
+"""
+
+import argparse
+import io
+import json
+import os
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from aggregations import summary_tables
+from chart_cache import chart_cache
+from partitions import list_partitions
+from refresh import export_store, partition_store
+
+API_PORT = int(os.environ.get('GROUP_SALES_API_PORT', 8502))
+
+FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Rows per streamed CSV chunk
+CSV_CHUNK_ROWS = 10000
+
+
+def table_bytes(frame, fmt):
+    if fmt == 'parquet':
+        buffer = io.BytesIO()
+        frame.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    if fmt == 'csv':
+        return frame.to_csv(index=False).encode('utf-8')
+    return frame.to_json(orient='records', date_format='iso').encode('utf-8')
+
+
+def csv_chunks(frame, rows=CSV_CHUNK_ROWS):
+    # The header, then the rows a slice at a time
+    yield frame.iloc[:0].to_csv(index=False).encode('utf-8')
+    for start in range(0, len(frame), rows):
+        yield frame.iloc[start:start + rows].to_csv(index=False, header=False).encode('utf-8')
+
+
+def tables_zip(tables, fmt='csv'):
+    """Every table in ``tables`` as <name>.<fmt> inside one zip archive."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, frame in tables.items():
+            archive.writestr(f'{name}.{fmt}', table_bytes(frame, fmt))
+    return buffer.getvalue()
+
+
+def cached_tables(dataset):
+    return chart_cache.get_or_build((dataset['version'], 'api', 'tables'), lambda: summary_tables(dataset['cube']))
+
+
+class TableHandler(BaseHTTPRequestHandler):
+    """Serves the summary tables of ``store``'s current dataset; GET only."""
+
+    protocol_version = 'HTTP/1.1'
+    store = None
+    source = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+
+        state = self.store.current()
+        dataset = state['dataset'] if state is not None else None
+        if dataset is None:
+            return self._send_error(503, 'No data is loaded')
+        # Tables built from an older version are stale now
+        chart_cache.track(self.source, dataset['version'])
+
+        if parts == ['tables']:
+            tables = cached_tables(dataset)
+            body = {'version': dataset['version'], 'generation': state['generation'],
+                    'tables': {name: {'rows': len(frame), 'columns': list(frame.columns)}
+                               for name, frame in tables.items()}}
+            return self._send(200, dataset['version'], 'json', json.dumps(body).encode('utf-8'))
+
+        if len(parts) == 2 and parts[0] == 'tables':
+            fmt = query.get('format', ['json'])[0]
+            if fmt not in FORMATS:
+                return self._send_error(400, f"Unknown format {fmt!r}; use one of {sorted(FORMATS)}")
+            tables = cached_tables(dataset)
+            if parts[1] not in tables:
+                return self._send_error(404, f"No table {parts[1]!r}; see /tables")
+            etag = f"{dataset['version']}.{parts[1]}.{fmt}"
+            if fmt == 'csv':
+                return self._send(200, etag, fmt, chunks=csv_chunks(tables[parts[1]]))
+            body = chart_cache.get_or_build((dataset['version'], 'api', parts[1], fmt),
+                                            lambda: table_bytes(tables[parts[1]], fmt))
+            return self._send(200, etag, fmt, body)
+
+        if parts == ['export']:
+            fmt = query.get('format', ['csv'])[0]
+            if fmt not in ('csv', 'parquet'):
+                return self._send_error(400, "Exports are csv or parquet")
+            body = chart_cache.get_or_build((dataset['version'], 'api', 'export', fmt),
+                                            lambda: tables_zip(cached_tables(dataset), fmt))
+            return self._send(200, f"{dataset['version']}.export.{fmt}", 'zip', body,
+                              filename=f"group-sales-{dataset['version'][:8]}-{fmt}.zip")
+
+        return self._send_error(404, 'Unknown path; see /tables')
+
+    def _not_modified(self, etag):
+        requested = self.headers.get('If-None-Match')
+        if requested is None:
+            return False
+        tags = [tag.strip().removeprefix('W/').strip('"') for tag in requested.split(',')]
+        return '*' in tags or etag in tags
+
+    def _send(self, status, etag, fmt, body=None, chunks=None, filename=None):
+        if self._not_modified(etag):
+            self.send_response(304)
+            self.send_header('ETag', f'"{etag}"')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header('Content-Type', FORMATS.get(fmt, 'application/zip'))
+        self.send_header('ETag', f'"{etag}"')
+        # Clients may keep a copy but must revalidate it on every poll
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Data-Version', etag.split('.')[0])
+        if filename:
+            self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        if chunks is None:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(f'{len(chunk):x}\r\n'.encode('ascii') + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _send_error(self, status, message):
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', FORMATS['json'])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(store, source, host='127.0.0.1', port=API_PORT):
+    """An HTTP server for ``store``; call serve_forever() to run it."""
+    handler = type('StoreTableHandler', (TableHandler,), {'store': store, 'source': source})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the dashboard summary tables over HTTP.')
+    parser.add_argument('--data', default='group_sales1.csv', help='ticketing export CSV (default: %(default)s)')
+    parser.add_argument('--partitions', help='serve a season of this partitioned store instead of --data')
+    parser.add_argument('--season', type=int, help='season to serve from --partitions (default: the latest)')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=API_PORT, help='port to listen on (default: %(default)s)')
+    args = parser.parse_args()
+
+    if args.partitions:
+        partition_index = list_partitions(args.partitions)
+        if partition_index.empty:
+            parser.error(f'no partitions under {args.partitions}')
+        season = args.season if args.season is not None else int(partition_index['season'].max())
+        store, source = partition_store(args.partitions, season), ('partitions', season)
+    else:
+        store, source = export_store(args.data), args.data
+
+    server = make_server(store, source, args.host, args.port)
+    print(f"Serving {source} on http://{args.host}:{args.port}/tables")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.stop()
@@ -0,0 +1,260 @@
+"""Time each stage the dashboard runs, on synthetic exports at several scales.
+
+Usage:
+    python -m benchmarks.run --scales 1 10 100 --output bench.json
+    python -m benchmarks.run --scales 10 --compare bench.json
+
+Every stage is run ``--repeat`` times and the fastest run is kept. Stages
+that fail at a scale (e.g. Altair's row limit) are recorded with their
+error instead of aborting the run. With ``--compare``, stages more than
+``--threshold`` times slower than the baseline are reported and the exit
+status is non-zero.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregations import (REP_SERIES_LABELS, eligible_reps, event_names, event_time_series, game_totals,
+                          mean_sales_curve, rep_comparison, rep_time_series, rep_totals, sales_distribution,
+                          sorted_events, stacked_distribution, top_rep_per_game)
+from benchmarks.synthetic import event_labels, scaled_params, write_synthetic
+from charts import (chart_payload, event_cumulative_chart, game_bar_chart, mean_sales_chart, payload_bytes,
+                    rep_bar_chart, rep_daily_chart, sales_distribution_chart)
+from cube import build_cube
+from filters import filter_index, filtered_dataset, selected_rows
+from ingest import CSV_ENCODING, SALES_SCHEMA, apply_schema, normalize_sales
+from pacing import PACE_GROUPS, pacing
+from seats import section_heatmap, section_rows, seat_index
+from snapshot_cache import read_snapshot, write_snapshot
+
+# Cap on selections timed per page so large scales stay tractable
+MAX_SELECTIONS = 50
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _sample(values, limit=MAX_SELECTIONS):
+    values = list(values)
+    if len(values) <= limit:
+        return values
+    return [values[i] for i in np.linspace(0, len(values) - 1, limit).astype(int)]
+
+
+def legacy_event_series(data, event_name):
+    # The per-rerun groupbys 'Sales by Game' used to run on the raw frame
+    filtered_data = data[data['event_name_display'] == event_name]
+    sales = filtered_data.groupby('days_difference')['block_full_price'].sum()
+    orders = filtered_data.groupby('days_difference')['acct_id'].nunique()
+    tickets = filtered_data.groupby('days_difference')['num_seats'].sum()
+    return sales, orders, tickets
+
+
+def legacy_rep_series(data, sales_rep):
+    # The three per-rep groupby + date_range reindex pipelines
+    filtered_rep_data = data[data['acct_rep_full_name'] == sales_rep]
+    dates = filtered_rep_data['add_datetime'].dt.date
+    frames = []
+    for series in (filtered_rep_data.groupby(dates)['block_full_price'].sum(),
+                   filtered_rep_data.groupby(dates)['acct_id'].nunique(),
+                   filtered_rep_data.groupby(dates)['num_seats'].sum()):
+        full_date_range = pd.date_range(start=series.index.min(), end=series.index.max())
+        frames.append(series.reindex(full_date_range.date).fillna(0))
+    return frames
+
+
+def expanded_seat_rows(data, event_name):
+    # One row per seat, then seats per section and row
+    event_rows = data[data['event_name_display'] == event_name]
+    seats = event_rows.loc[event_rows.index.repeat(event_rows['num_seats']), ['section_name', 'row_name']]
+    return seats.groupby(['section_name', 'row_name'], observed=True).size()
+
+
+def reachable_charts(cube, mean_sales_data, event_name, sales_rep):
+    # Every chart a user can reach for one game and one rep
+    sales, orders, tickets = event_time_series(cube, event_name)
+    charts = [
+        event_cumulative_chart(sales, 'Cumulative Sales', event_name) + mean_sales_chart(mean_sales_data),
+        event_cumulative_chart(orders, 'Cumulative Orders', event_name),
+        event_cumulative_chart(tickets, 'Cumulative Tickets Sold', event_name),
+    ]
+    rep_series = rep_time_series(cube, sales_rep)
+    if rep_series is not None:
+        charts += [rep_daily_chart(frame, frame.columns[1], sales_rep) for frame in rep_series]
+
+    event_order = sorted_events(cube)
+    reps = eligible_reps(cube)
+    games = game_totals(cube)
+    rep_table = rep_totals(cube, reps)
+    charts += [game_bar_chart(games, column, column, event_order) for column in ('block_full_price', 'total_orders', 'num_seats')]
+    charts += [rep_bar_chart(rep_table, column, column) for column in ('block_full_price', 'total_orders', 'num_seats')]
+    charts.append(sales_distribution_chart(stacked_distribution(sales_distribution(cube, reps)), event_order))
+    return charts
+
+
+def run_scale(scale, repeat, work_dir, seed=0):
+    params = scaled_params(scale)
+    csv_path = os.path.join(work_dir, f'synthetic_{scale:g}x.csv')
+    rows, _ = write_synthetic(csv_path, scale, seed)
+    labels = event_labels(params['n_events'])
+    stages = {}
+
+    def stage(name, function, calls=1):
+        try:
+            seconds, result = timed(function, repeat)
+        except Exception as e:
+            stages[name] = {'error': f'{type(e).__name__}: {e}'}
+            return None
+        stages[name] = {'seconds': seconds, 'calls': calls, 'per_call': seconds / calls}
+        return result
+
+    category_columns = {column: 'category' for column, kind in SALES_SCHEMA.items() if kind == 'category'}
+    numeric_schema = {column: kind for column, kind in SALES_SCHEMA.items() if kind != 'datetime'}
+
+    stage('csv_load_full', lambda: pd.read_csv(csv_path, encoding=CSV_ENCODING))
+    raw = stage('csv_load', lambda: pd.read_csv(csv_path, encoding=CSV_ENCODING,
+                                                usecols=lambda column: column in SALES_SCHEMA,
+                                                dtype=category_columns))
+    typed = stage('downcast', lambda: apply_schema(raw.copy(), numeric_schema))
+    typed['add_datetime'] = stage('datetime_parse', lambda: pd.to_datetime(typed['add_datetime']))
+
+    stage('event_mapping_legacy', lambda: typed['event_name'].astype(object).map(labels).fillna(typed['event_name']))
+    data = stage('event_mapping', lambda: normalize_sales(typed.copy()))
+
+    snapshot = os.path.join(work_dir, f'snapshot_{scale:g}x.parquet')
+    stage('snapshot_write', lambda: write_snapshot(data, snapshot))
+    stage('snapshot_read', lambda: read_snapshot(snapshot))
+
+    cube = stage('cube_build', lambda: build_cube(data))
+    events = _sample(event_names(cube))
+    reps = eligible_reps(cube) or list(cube['cells']['acct_rep_full_name'].unique())
+    rep_sample = _sample(reps)
+
+    stage('sales_by_game', lambda: [event_time_series(cube, name) for name in events], len(events))
+    stage('sales_by_game_legacy', lambda: [legacy_event_series(data, name) for name in events], len(events))
+    # Drop the cube's cached rep/day arrays so every repeat pays for the scatter
+    stage('rep_performance', lambda: (cube.pop('rep_days', None),
+                                      [rep_time_series(cube, rep) for rep in rep_sample]), len(rep_sample))
+    stage('rep_performance_legacy', lambda: [legacy_rep_series(data, rep) for rep in rep_sample], len(rep_sample))
+    stage('rep_compare_all', lambda: (cube.pop('rep_days', None),
+                                      [rep_comparison(cube, reps, column, resolution=resolution)
+                                       for resolution in ('Daily', 'Weekly', 'Monthly') for column in REP_SERIES_LABELS]))
+    stage('cumulative_games', lambda: game_totals(cube))
+    stage('cumulative_reps', lambda: (rep_totals(cube, reps),
+                                      top_rep_per_game(sales_distribution(cube, reps))))
+
+    stage('pacing_board', lambda: (cube.pop('event_days', None), [pacing(cube, by=by) for by in PACE_GROUPS]))
+
+    seat_dataset = {'data': data, 'cube': cube}
+    stage('seat_index', lambda: (cube.pop('seat_index', None), seat_index(seat_dataset)))
+    stage('seat_map', lambda: [section_rows(seat_index(seat_dataset), name) for name in events], len(events))
+    # The same per-game density by expanding every block into its seats
+    stage('seat_map_expanded', lambda: [expanded_seat_rows(data, name) for name in events], len(events))
+    stage('seat_heatmap', lambda: section_heatmap(seat_index(seat_dataset)))
+
+    # Four filters together: bitmap intersection against one mask per column
+    price_codes = list(data['price_code'].cat.categories[:3])
+    filter_start = data['add_datetime'].min() + pd.Timedelta(days=30)
+    selections = {'price_code': price_codes, 'acct_type_desc': ['Personal', 'Account Manager'], 'paid': ['Y']}
+    stage('filter_index', lambda: (cube.pop('filter_index', None), filter_index(seat_dataset)))
+    stage('filter_bitmap', lambda: selected_rows(filter_index(seat_dataset), selections, filter_start))
+
+    def filter_mask():
+        return np.flatnonzero(
+            (data['price_code'].isin(price_codes) & data['acct_type_desc'].isin(selections['acct_type_desc'])
+             & data['paid'].isin(['Y']) & (data['add_datetime'].dt.normalize() >= filter_start)).to_numpy())
+
+    stage('filter_mask', filter_mask)
+    # End to end: the selected rows plus the filtered view's cube the pages read
+    stage('filter_view', lambda: filtered_dataset({**seat_dataset, 'version': 'benchmark'}, selections, filter_start))
+    stage('filter_view_mask', lambda: build_cube(data.take(filter_mask()).reset_index(drop=True)))
+
+    mean_sales_data = mean_sales_curve(cube)
+    charts = reachable_charts(cube, mean_sales_data, events[0], rep_sample[0])
+    spec_bytes = stage('altair_serialization', lambda: sum(len(chart.to_json()) for chart in charts))
+    if spec_bytes is not None:
+        stages['altair_serialization']['bytes'] = spec_bytes
+    payload_size = stage('arrow_payload', lambda: sum(payload_bytes(chart_payload(chart)) for chart in charts))
+    if payload_size is not None:
+        stages['arrow_payload']['bytes'] = payload_size
+
+    return {'scale': scale, 'rows': rows, 'params': params,
+            'cube_cells': len(cube['cells']), 'stages': stages}
+
+
+def compare(results, baseline, threshold):
+    # Stage-by-stage slowdowns against a previous run at the same scale
+    previous = {result['scale']: result['stages'] for result in baseline['results']}
+    regressions = []
+    for result in results:
+        for name, current in result['stages'].items():
+            before = previous.get(result['scale'], {}).get(name)
+            if not before or 'seconds' not in before or 'seconds' not in current:
+                continue
+            ratio = current['seconds'] / before['seconds'] if before['seconds'] else float('inf')
+            if ratio > threshold:
+                regressions.append((result['scale'], name, before['seconds'], current['seconds'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard stages on synthetic data.')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here')
+    parser.add_argument('--compare', help='baseline results JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio counted as a regression')
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for scale in args.scales:
+            result = run_scale(scale, args.repeat, work_dir, args.seed)
+            results.append(result)
+            print(f"{scale:g}x ({result['rows']:,} rows)")
+            for name, stage in result['stages'].items():
+                if 'error' in stage:
+                    print(f"  {name:<24} FAILED {stage['error']}")
+                else:
+                    print(f"  {name:<24} {stage['seconds'] * 1000:10.1f} ms")
+
+    report = {
+        'generated_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for scale, name, before, after, ratio in regressions:
+            print(f"REGRESSION {scale:g}x {name}: {before * 1000:.1f} ms -> {after * 1000:.1f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
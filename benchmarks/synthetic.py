@@ -0,0 +1,176 @@
+"""Synthetic ticketing exports with the same 45-column layout as group_sales1.csv.
+
+Usage:
+    python -m benchmarks.synthetic --scale 100 --out synthetic_100x.csv
+
+``scale`` multiplies the sample's row count. Accounts and rows per account
+each grow by sqrt(scale), so rows grow linearly, and events and reps grow
+at the same rate as accounts. Each of those can also be set directly.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Shape of group_sales1.csv, the 1x reference
+BASE_ROWS = 2787
+BASE_EVENTS = 20
+BASE_REPS = 13
+BASE_ACCOUNTS = 609
+
+COLUMNS = [
+    'event_name', 'section_name', 'row_name', 'seat_num', 'last_seat', 'num_seats', 'acct_id',
+    'owner_name', 'zip', 'add_datetime', 'price_code', 'promo_code', 'paid', 'printed', 'mobile',
+    'group_flag', 'consignment', 'comp', 'comp_name', 'purchase_price', 'block_purchase_price',
+    'full_price', 'block_full_price', 'percent_paid', 'paid_amount', 'acct_rep_id',
+    'acct_rep_full_name', 'ticket_status', 'assoc_acct_id', 'inet_purchase_price', 'acct_type_desc',
+    'ticket_type', 'ticket_type_category', 'add_usr', 'ledger_code', 'plan_event_name',
+    'seat_holder_name', 'retail_ticket_type', 'retail_qualifiers', 'retail_price_level',
+    'sub_plan_event_name', 'privacy_restrict', 'privacy_opt_out', 'gamedate', 'days_difference',
+]
+
+SECTIONS = [str(section) for section in list(range(11, 29)) + list(range(101, 123))]
+ROWS = list('ABCDEFGHJKLMNPQRSTU') + ['BC', 'BW']
+PRICE_LEVELS = list('KLMNPQR')
+PRICE_SUFFIXES = ['GR', 'G5', 'DV', 'SQ', 'HO1', '3F', 'Q0']
+FULL_PRICES = np.array([15, 20, 30, 40, 45, 50, 60])
+TICKET_TYPES = ['GR-Group Tickets', 'GR - Indiana Fever Group Speci', 'GR-Community Spotlight Package',
+                'GR-Hometown Heros', 'GR--Pfizer', 'GR--Girl Scout Day', 'GR-Camp Day']
+ACCT_TYPES = ['CT SUN ONLY', 'Personal', 'Account Manager', 'WOLVES ONLY', 'Window Account']
+OPPONENTS = ['Liberty', 'Fever', 'Mystics', 'Lynx', 'Mercury', 'Wings', 'Sparks', 'Dream', 'Sky',
+             'Storm', 'Aces', 'Valkyries']
+
+
+def scaled_params(scale):
+    # Rows are accounts x rows per account, so each grows by sqrt(scale)
+    factor = scale ** 0.5
+    return {
+        'n_events': max(1, round(BASE_EVENTS * factor)),
+        'n_reps': max(1, round(BASE_REPS * factor)),
+        'n_accounts': max(1, round(BASE_ACCOUNTS * factor)),
+        'rows_per_account': BASE_ROWS / BASE_ACCOUNTS * factor,
+    }
+
+
+def game_schedule(n_events, first_season=2024):
+    # Games run May through September; extra games roll into earlier seasons
+    per_season = BASE_EVENTS
+    games = []
+    for i in range(n_events):
+        season = first_season - i // per_season
+        slot = i % per_season
+        game_date = pd.Timestamp(season, 5, 9) + pd.Timedelta(days=round(slot * 133 / per_season))
+        suffix = 'L' if slot % 2 else ''
+        games.append((f"E{game_date:%y%m%d}{suffix}", game_date))
+    return games
+
+
+def generate(n_events=BASE_EVENTS, n_reps=BASE_REPS, n_accounts=BASE_ACCOUNTS,
+             rows_per_account=BASE_ROWS / BASE_ACCOUNTS, seed=0):
+    """Return a synthetic export with the raw CSV's columns, in the same order."""
+    rng = np.random.default_rng(seed)
+    n_rows = max(1, round(n_accounts * rows_per_account))
+
+    games = game_schedule(n_events)
+    game_codes = np.array([code for code, _ in games])
+    game_dates = np.array([date for _, date in games], dtype='datetime64[ns]')
+
+    rep_names = np.array([f'Rep {i:04d}' for i in range(n_reps)])
+    rep_ids = rng.choice(10 ** 7, n_reps, replace=False) + 10 ** 7
+    account_ids = rng.choice(9 * 10 ** 7, n_accounts, replace=False) + 10 ** 7
+    account_reps = rng.integers(0, n_reps, n_accounts)
+
+    # Rows cluster on accounts and on popular games, like real group sales
+    account = rng.zipf(1.6, n_rows) % n_accounts
+    event = rng.zipf(1.4, n_rows) % n_events
+    rep = account_reps[account]
+
+    days_difference = np.minimum(rng.geometric(1 / 30, n_rows) - 1, 170)
+    add_datetime = game_dates[event] - days_difference.astype('timedelta64[D]')
+
+    num_seats = rng.integers(1, 26, n_rows)
+    seat_num = rng.integers(1, 25, n_rows)
+    full_price = FULL_PRICES[rng.integers(0, len(FULL_PRICES), n_rows)]
+    block_price = full_price * num_seats
+    price_code = np.char.add(np.array(PRICE_LEVELS)[rng.integers(0, len(PRICE_LEVELS), n_rows)],
+                             np.array(PRICE_SUFFIXES)[rng.integers(0, len(PRICE_SUFFIXES), n_rows)])
+
+    frame = pd.DataFrame({
+        'event_name': game_codes[event],
+        'section_name': np.array(SECTIONS)[rng.integers(0, len(SECTIONS), n_rows)],
+        'row_name': np.array(ROWS)[rng.integers(0, len(ROWS), n_rows)],
+        'seat_num': seat_num,
+        'last_seat': seat_num + num_seats - 1,
+        'num_seats': num_seats,
+        'acct_id': account_ids[account],
+        'owner_name': np.char.add('Account ', account.astype(str)),
+        'zip': np.char.zfill(rng.integers(6000, 6999, n_rows).astype(str), 5),
+        'add_datetime': pd.to_datetime(add_datetime).strftime('%Y-%m-%d'),
+        'price_code': price_code,
+        'promo_code': 'NA',
+        'paid': np.array(['Y', 'P', 'N'])[rng.choice(3, n_rows, p=[0.9, 0.05, 0.05])],
+        'printed': rng.integers(0, 5, n_rows),
+        'mobile': np.array(['Y', 'N'])[rng.integers(0, 2, n_rows)],
+        'group_flag': np.array(['N', 'Y'])[rng.integers(0, 2, n_rows)],
+        'consignment': 'N',
+        'comp': 'N',
+        'comp_name': 'Not Comp',
+        'purchase_price': full_price,
+        'block_purchase_price': block_price,
+        'full_price': full_price,
+        'block_full_price': block_price,
+        'percent_paid': 100,
+        'paid_amount': block_price,
+        'acct_rep_id': rep_ids[rep],
+        'acct_rep_full_name': rep_names[rep],
+        'ticket_status': 'Active',
+        'assoc_acct_id': 'NA',
+        'inet_purchase_price': 'NA',
+        'acct_type_desc': np.array(ACCT_TYPES)[rng.integers(0, len(ACCT_TYPES), n_rows)],
+        'ticket_type': np.array(TICKET_TYPES)[rng.choice(len(TICKET_TYPES), n_rows, p=[0.9] + [0.1 / 6] * 6)],
+        'ticket_type_category': 'Full Price',
+        'add_usr': np.char.add('USR', rep.astype(str)),
+        'ledger_code': 'GEN',
+        'plan_event_name': 'NA',
+        'seat_holder_name': 'NA',
+        'retail_ticket_type': 'NA',
+        'retail_qualifiers': 'NA',
+        'retail_price_level': 'NA',
+        'sub_plan_event_name': 'NA',
+        'privacy_restrict': 'NA',
+        'privacy_opt_out': 'NA',
+        'gamedate': pd.to_datetime(game_dates[event]).strftime('%Y-%m-%d'),
+        'days_difference': days_difference,
+    })
+    return frame[COLUMNS]
+
+
+def event_labels(n_events):
+    # Display labels in the dashboard's "M/D v.s. Opponent" style
+    return {code: f"{date.month}/{date.day} v.s. {OPPONENTS[i % len(OPPONENTS)]}"
+            for i, (code, date) in enumerate(game_schedule(n_events))}
+
+
+def write_synthetic(path, scale=1, seed=0, **overrides):
+    params = {**scaled_params(scale), **overrides}
+    frame = generate(seed=seed, **params)
+    frame.to_csv(path, index=False, encoding='latin1')
+    return len(frame), params
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic group sales export.')
+    parser.add_argument('--scale', type=float, default=1, help='row-count multiple of the sample export')
+    parser.add_argument('--events', type=int, dest='n_events')
+    parser.add_argument('--reps', type=int, dest='n_reps')
+    parser.add_argument('--accounts', type=int, dest='n_accounts')
+    parser.add_argument('--rows-per-account', type=float, dest='rows_per_account')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic.csv')
+    args = parser.parse_args()
+
+    overrides = {key: value for key, value in vars(args).items()
+                 if key in ('n_events', 'n_reps', 'n_accounts', 'rows_per_account') and value is not None}
+    rows, params = write_synthetic(args.out, args.scale, args.seed, **overrides)
+    print(f'Wrote {rows:,} rows to {args.out} ({params})')
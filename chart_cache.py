@@ -0,0 +1,130 @@
+"""Process-wide LRU cache for page datasets and serialized chart specs.
+
+Streamlit reruns the whole script on every interaction, so a selection is
+otherwise recomputed each time anyone touches an unrelated widget. Entries
+are keyed on (data version, page, selection, option) and evicted least
+recently used once their estimated size passes the byte budget. The budget
+can be set with GROUP_SALES_CHART_CACHE_MB. Every session in the server
+process shares the cache, so popular games are built once for all users.
+"""
+
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+CHART_CACHE_BYTES = int(float(os.environ.get('GROUP_SALES_CHART_CACHE_MB', 256)) * 1024 * 1024)
+
+
+def entry_bytes(value):
+    # Rough resident size of a cached value: frames, specs and containers of them
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return sys.getsizeof(value) + sum(entry_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(entry_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ChartCache:
+    """Thread-safe LRU mapping of cache keys to built page values."""
+
+    def __init__(self, max_bytes=CHART_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key, build):
+        """Return the value cached under ``key``, calling ``build()`` on a miss.
+
+        ``key`` is a tuple whose first item is the data version. Values are
+        shared between sessions, so callers must not mutate them.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        # Build outside the lock so one slow page doesn't block other sessions
+        value = build()
+        self._store(key, value, entry_bytes(value))
+        return value
+
+    def remeasure(self, key):
+        """Re-account the size of the value under ``key``.
+
+        Cached datasets grow after insertion as their cubes pick up derived
+        indexes (rep/day arrays, seat and filter indexes); callers re-measure
+        them once those may have been built, so the budget still bounds memory.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            self._store(key, entry[0], entry_bytes(entry[0]), touch=False)
+
+    def _store(self, key, value, size, touch=True):
+        with self._lock:
+            if not touch and self._entries.get(key, (None,))[0] is not value:
+                # Evicted or replaced while it was being measured
+                return
+            if key in self._entries:
+                self.bytes -= self._entries[key][1]
+                if touch:
+                    del self._entries[key]
+            if size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self.bytes += size
+            else:
+                self._entries.pop(key, None)
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def track(self, source, version):
+        """Note the current ``version`` of ``source``, discarding the entries
+        built from its previous version when it has changed."""
+        with self._lock:
+            previous = self._versions.get(source)
+            self._versions[source] = version
+        if previous is not None and previous != version:
+            self.discard_version(previous)
+
+    def discard_version(self, version):
+        # Drop everything built from a data version that has been superseded,
+        # including filtered views of it ("<version>+<filter key>")
+        with self._lock:
+            for key in [key for key in self._entries
+                        if key[0] == version or str(key[0]).startswith(f'{version}+')]:
+                self.bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+chart_cache = ChartCache()
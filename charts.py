@@ -0,0 +1,193 @@
+"""Altair chart builders shared by the dashboard and the batch report."""
+
+import hashlib
+import json
+import threading
+
+import altair as alt
+import pyarrow as pa
+
+# Datasets collected by the arrow_reference transformer during one to_dict()
+_payload_datasets = {}
+_payload_lock = threading.Lock()
+
+
+def _arrow_reference(data):
+    # Altair data transformer: keep the frame as Arrow IPC bytes and refer to
+    # it by a content-hashed name instead of inlining its rows as JSON
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    arrow = sink.getvalue().to_pybytes()
+    name = f'data-{hashlib.sha1(arrow).hexdigest()[:16]}'
+    _payload_datasets[name] = arrow
+    return {'name': name}
+
+
+alt.data_transformers.register('arrow_reference', _arrow_reference)
+
+
+def chart_payload(chart):
+    """``chart`` as a Vega-Lite spec (JSON) whose data is referenced by name,
+    with those datasets alongside as Arrow IPC bytes."""
+    # The transformer registry is global, so serialize one chart at a time
+    with _payload_lock:
+        _payload_datasets.clear()
+        with alt.data_transformers.enable('arrow_reference'):
+            spec = chart.to_dict()
+        return {'spec': json.dumps(spec), 'datasets': dict(_payload_datasets)}
+
+
+def payload_bytes(payload):
+    return len(payload['spec']) + sum(len(data) for data in payload['datasets'].values())
+
+
+def _line(color):
+    return {} if color is None else {'color': color}
+
+
+def event_cumulative_chart(frame, column, event_name, color=None):
+    # Running total of ``column`` by days before the game
+    return alt.Chart(frame).mark_line(**_line(color)).encode(
+        x=alt.X('Days Difference:Q', sort='descending', title='Days Before the Game'),
+        y=alt.Y(f'{column}:Q', axis=alt.Axis(title=column)),
+        tooltip=['Days Difference:Q', f'{column}:Q']
+    ).properties(
+        title=f'{column} Over Time for Event: {event_name}',
+        width=800,
+        height=300
+    )
+
+
+def mean_sales_chart(mean_sales_data):
+    return alt.Chart(mean_sales_data).mark_line(color='red').encode(
+        x=alt.X('days_difference:Q', sort='descending', title='Days Before the Game'),
+        y=alt.Y('Cumulative Mean Sales:Q'),
+    )
+
+
+def rep_daily_chart(frame, column, sales_rep, color=None):
+    return alt.Chart(frame).mark_line(**_line(color)).encode(
+        x='Date:T',
+        y=alt.Y(f'{column}:Q', axis=alt.Axis(title=column)),
+        tooltip=['Date:T', f'{column}:Q']
+    ).properties(
+        title=f'{column} Over Time for {sales_rep}',
+        width=800,
+        height=300
+    )
+
+
+def game_bar_chart(frame, column, title, sorted_events):
+    return alt.Chart(frame).mark_bar().encode(
+        x=alt.X('event_name_display', sort=sorted_events, axis=alt.Axis(title='Game')),
+        y=alt.Y(column, axis=alt.Axis(title=title)),
+        tooltip=['event_name_display', column]
+    ).properties(
+        width=800,
+        height=400
+    )
+
+
+def rep_bar_chart(frame, column, title):
+    return alt.Chart(frame).mark_bar().encode(
+        x=alt.X('acct_rep_full_name', sort='-y', axis=alt.Axis(title='Sales Representative')),
+        y=alt.Y(column, axis=alt.Axis(title=title)),
+        tooltip=['acct_rep_full_name', column]
+    ).properties(
+        width=800,
+        height=400
+    )
+
+
+def sales_distribution_chart(stacked, event_order):
+    # Segments are stacked server-side (see aggregations.stacked_distribution)
+    return alt.Chart(stacked).mark_bar().encode(
+        x=alt.X('event_name_display:N', sort=event_order, axis=alt.Axis(title='Game')),
+        y=alt.Y('share_start:Q', axis=alt.Axis(format='%'), title='Sales Percentage', scale=alt.Scale(domain=[0, 1])),
+        y2='share_end:Q',
+        color=alt.Color('acct_rep_full_name:N', legend=alt.Legend(title='Account Rep')),
+        tooltip=['event_name_display:N', 'acct_rep_full_name:N', 'block_full_price:Q', 'sales_percentage:Q']
+    ).properties(
+        width=800,
+        height=400
+    )
+
+
+def rep_comparison_chart(frame, column, title):
+    # One line per rep on the shared date axis
+    return alt.Chart(frame).mark_line().encode(
+        x='Date:T',
+        y=alt.Y(f'{column}:Q', axis=alt.Axis(title=column)),
+        color=alt.Color('acct_rep_full_name:N', legend=alt.Legend(title='Account Rep')),
+        tooltip=['Date:T', 'acct_rep_full_name:N', f'{column}:Q']
+    ).properties(
+        title=title,
+        width=800,
+        height=300
+    )
+
+
+def pacing_curve_chart(curves):
+    # Historical P10-P90 band around the mean and median cumulative curves
+    base = alt.Chart(curves).encode(x=alt.X('days_difference:Q', sort='descending', title='Days Before the Game'))
+    band = base.mark_area(opacity=0.2).encode(y=alt.Y('P10:Q', title='Cumulative Sales'), y2='P90:Q')
+    mean = base.mark_line(color='red').encode(
+        y='Mean:Q',
+        tooltip=['days_difference:Q', 'Mean:Q', 'P10:Q', 'P50:Q', 'P90:Q']
+    )
+    median = base.mark_line(strokeDash=[4, 4]).encode(y='P50:Q')
+    return (band + mean + median).properties(
+        title='Cumulative Sales Curve of Played Games (mean, median and P10-P90)',
+        width=800,
+        height=300
+    )
+
+
+def pacing_board_chart(board):
+    # Sales to date inside each game's projected final, with its P10-P90 range
+    base = alt.Chart(board).encode(x=alt.X('Game:N', sort=list(board['Game']), axis=alt.Axis(title='Game')))
+    projected = base.mark_bar(opacity=0.35).encode(
+        y=alt.Y('Projected Sales:Q', axis=alt.Axis(title='Sales ($)')),
+        tooltip=['Game:N', 'Days Out:Q', 'Sales to Date:Q', 'Projected Sales:Q', 'Low (P10):Q', 'High (P90):Q']
+    )
+    to_date = base.mark_bar().encode(y='Sales to Date:Q')
+    band = base.mark_rule().encode(y='Low (P10):Q', y2='High (P90):Q')
+    return (projected + to_date + band).properties(
+        title='Projected Final Sales for Upcoming Games',
+        width=800,
+        height=400
+    )
+
+
+def section_row_heatmap(frame, event_name, sections, rows):
+    # Share of each row's seats sold to groups, one cell per (section, row)
+    return alt.Chart(frame).mark_rect().encode(
+        x=alt.X('Row:N', sort=rows, axis=alt.Axis(title='Row')),
+        y=alt.Y('Section:N', sort=sections, axis=alt.Axis(title='Section')),
+        color=alt.Color('Density:Q', scale=alt.Scale(scheme='oranges', domain=[0, 1]),
+                        legend=alt.Legend(title='Share of Row Sold', format='%')),
+        tooltip=['Section:N', 'Row:N', 'Seats Sold:Q', 'Row Seats:Q', alt.Tooltip('Density:Q', format='.0%'),
+                 alt.Tooltip('Sales:Q', format='$,.0f'), alt.Tooltip('Avg Days Out:Q', format='.0f')]
+    ).properties(
+        title=f'Group Seat Density by Section and Row for Event: {event_name}',
+        width=800,
+        height=600
+    )
+
+
+def section_game_heatmap(frame, event_order, sections):
+    # Group seats per section for every game, shaded by the share of the section sold
+    return alt.Chart(frame).mark_rect().encode(
+        x=alt.X('Game:N', sort=event_order, axis=alt.Axis(title='Game')),
+        y=alt.Y('Section:N', sort=sections, axis=alt.Axis(title='Section')),
+        color=alt.Color('Density:Q', scale=alt.Scale(scheme='oranges'),
+                        legend=alt.Legend(title='Share of Section Sold', format='%')),
+        tooltip=['Game:N', 'Section:N', 'Seats Sold:Q', alt.Tooltip('Density:Q', format='.0%'),
+                 alt.Tooltip('Sales:Q', format='$,.0f'), alt.Tooltip('Avg Days Out:Q', format='.0f')]
+    ).properties(
+        title='Group Seats by Section Across Games',
+        width=800,
+        height=600
+    )
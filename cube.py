@@ -0,0 +1,223 @@
+"""Pre-aggregated sales cube shared by every dashboard page.
+
+The cube holds one cell per (event, rep, days_difference, add_date) with
+summed sales, tickets and row counts, plus a table of distinct accounts per
+cell. Pages roll up from these two small frames instead of rescanning the
+raw ticket rows; order counts come from de-duplicating accounts over the
+rolled-up keys, so they match a ``nunique`` on the raw rows exactly.
+Selecting one event or rep reads only that value's rows of either table,
+through per-value row positions built once per cube.
+Optionally, orders can instead be estimated with HyperLogLog sketches,
+built from the selected accounts at the rolled-up grain.
+"""
+
+import numpy as np
+import pandas as pd
+
+from hyperloglog import group_estimates, precision_for_error
+from ingest import concat_sales
+
+CUBE_KEYS = ['event_name_display', 'acct_rep_full_name', 'days_difference', 'add_date']
+
+MEASURES = ['block_full_price', 'num_seats', 'rows']
+
+# Keys whose selections are served from per-value row positions
+SLICED_KEYS = ['event_name_display', 'acct_rep_full_name']
+
+
+def _with_add_date(df):
+    df = df[['event_name_display', 'acct_rep_full_name', 'days_difference',
+             'add_datetime', 'acct_id', 'block_full_price', 'num_seats']]
+    return df.assign(add_date=df['add_datetime'].dt.normalize(), rows=1)
+
+
+def build_cube(df):
+    rows = _with_add_date(df)
+
+    cells = rows.groupby(CUBE_KEYS, observed=True, sort=False)[MEASURES].sum().reset_index()
+    # Signed measures so removed rows can be subtracted in update_cube
+    cells = cells.astype({measure: 'int64' for measure in MEASURES if cells[measure].dtype.kind == 'u'})
+
+    # Distinct accounts per cell, with the number of rows behind each so the
+    # structure can be merged (and later un-merged) by adding row counts
+    accounts = rows.groupby(CUBE_KEYS + ['acct_id'], observed=True, sort=False).size()
+    accounts = accounts.reset_index(name='rows')
+
+    return {'cells': cells, 'accounts': accounts}
+
+
+def row_positions(cube, df):
+    """Position in ``cube`` of each of ``df``'s rows' cell and account row.
+
+    ``df`` must be the frame ``cube`` was built from; rows with a missing
+    key get -1, as they are left out of the cube.
+    """
+    rows = _with_add_date(df)
+    cells = pd.MultiIndex.from_frame(cube['cells'][CUBE_KEYS])
+    accounts = pd.MultiIndex.from_frame(cube['accounts'][CUBE_KEYS + ['acct_id']])
+    return (cells.get_indexer(pd.MultiIndex.from_frame(rows[CUBE_KEYS])),
+            accounts.get_indexer(pd.MultiIndex.from_frame(rows[CUBE_KEYS + ['acct_id']])))
+
+
+def sub_cube(cube, df, cell_positions, account_positions):
+    """The cube of a subset of the rows ``cube`` was built from.
+
+    ``cell_positions`` and ``account_positions`` are the subset's rows'
+    positions from ``row_positions``. The subset's cells are re-totalled
+    from those positions rather than grouped again, so the cost is a few
+    bincounts rather than a full ``build_cube``.
+    """
+    cells, accounts = cube['cells'], cube['accounts']
+    kept = cell_positions >= 0
+    counts = np.bincount(cell_positions[kept], minlength=len(cells))
+    used = np.flatnonzero(counts)
+    sub_cells = {column: cells[column].array.take(used) for column in CUBE_KEYS}
+    for measure in MEASURES:
+        values = np.ones(kept.sum()) if measure == 'rows' else df[measure].to_numpy()[kept]
+        totals = np.bincount(cell_positions[kept], weights=values, minlength=len(cells))[used]
+        sub_cells[measure] = totals.astype(cells[measure].dtype)
+
+    kept = account_positions >= 0
+    account_counts = np.bincount(account_positions[kept], minlength=len(accounts))
+    used = np.flatnonzero(account_counts)
+    sub_accounts = {column: accounts[column].array.take(used) for column in CUBE_KEYS + ['acct_id']}
+    sub_accounts['rows'] = account_counts[used].astype(accounts['rows'].dtype)
+    return {'cells': pd.DataFrame(sub_cells), 'accounts': pd.DataFrame(sub_accounts)}
+
+
+def _combine(frames, keys, measures):
+    combined = concat_sales(frames)
+    combined = combined.groupby(keys, observed=True, sort=False)[measures].sum().reset_index()
+    return combined[combined['rows'] != 0].reset_index(drop=True)
+
+
+def update_cube(cube, removed, added):
+    """Apply replaced and newly added ticket rows to ``cube`` in place.
+
+    Only the delta rows are aggregated; they are then merged into the
+    existing cells and account counts, with removed rows subtracted.
+    """
+    removed_cube = build_cube(removed)
+    added_cube = build_cube(added)
+
+    removed_cells = removed_cube['cells'].assign(**{
+        measure: -removed_cube['cells'][measure] for measure in MEASURES})
+    removed_accounts = removed_cube['accounts'].assign(rows=-removed_cube['accounts']['rows'].astype('int64'))
+
+    cube['cells'] = _combine([cube['cells'], removed_cells, added_cube['cells']], CUBE_KEYS, MEASURES)
+    cube['accounts'] = _combine(
+        [cube['accounts'], removed_accounts, added_cube['accounts']], CUBE_KEYS + ['acct_id'], ['rows'])
+    # Slice positions, account cells, the rep/day and event/day arrays and
+    # the seat and filter indexes describe the old rows
+    for derived in ('slices', 'account_cells', 'rep_days', 'event_days', 'seat_index', 'filter_index'):
+        cube.pop(derived, None)
+    return cube
+
+
+def account_cells(cube):
+    """Position in ``cube['cells']`` of each account row's cell, cached on the cube."""
+    positions = cube.get('account_cells')
+    if positions is None:
+        cells = pd.MultiIndex.from_frame(cube['cells'][CUBE_KEYS])
+        positions = cube['account_cells'] = cells.get_indexer(pd.MultiIndex.from_frame(cube['accounts'][CUBE_KEYS]))
+    return positions
+
+
+def _positions(cube, table, column):
+    # Row positions of each value of ``column`` in ``cube[table]``, built once per cube
+    slices = cube.setdefault('slices', {})
+    if (table, column) not in slices:
+        slices[table, column] = cube[table].groupby(column, observed=True, sort=False).indices
+    return slices[table, column]
+
+
+def _select(cube, table, where):
+    # Sorted positions of the rows of ``cube[table]`` matching ``where``.
+    # Event and rep conditions read their values' rows from the cached
+    # positions, so a selection only touches its own slice of the table
+    frame = cube[table]
+    positions, rest = None, {}
+    for column, value in (where or {}).items():
+        if column not in SLICED_KEYS:
+            rest[column] = value
+            continue
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        index = _positions(cube, table, column)
+        found = np.unique(np.concatenate([index[value] for value in values if value in index] or [[]]))
+        positions = found if positions is None else np.intersect1d(positions, found)
+    positions = np.arange(len(frame)) if positions is None else positions.astype(np.intp)
+
+    for column, value in rest.items():
+        values = frame[column].take(positions)
+        if isinstance(value, (list, tuple, set)):
+            positions = positions[values.isin(value).to_numpy()]
+        else:
+            positions = positions[(values == value).to_numpy()]
+    return positions
+
+
+def _group_codes(frame, by, positions):
+    # Group number per selected row, in the order groupby(by, observed=True)
+    # sorts the groups, or -1 for rows with a missing key; also returns each
+    # group's first row
+    codes = np.zeros(len(positions), dtype=np.int64)
+    missing = np.zeros(len(positions), dtype=bool)
+    for column in by:
+        values = frame[column].take(positions)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            column_codes, size = values.cat.codes.to_numpy().astype(np.int64), len(values.cat.categories)
+        else:
+            column_codes, uniques = pd.factorize(values, sort=True)
+            size = len(uniques)
+        missing |= column_codes < 0
+        codes = codes * max(size, 1) + column_codes
+    keys, first, groups = np.unique(codes[~missing], return_index=True, return_inverse=True)
+    inverse = np.full(len(positions), -1, dtype=np.int64)
+    inverse[~missing] = groups.ravel()
+    return inverse, np.flatnonzero(~missing)[first], len(keys)
+
+
+def _group_sums(values, groups, n_groups):
+    # Per-group sums of each of ``values``' arrays, keeping their dtypes
+    order = np.argsort(groups, kind='stable')
+    starts = np.searchsorted(groups[order], np.arange(n_groups))
+    return [np.add.reduceat(column[order], starts) if n_groups else column[:0] for column in values]
+
+
+def rollup(cube, by, where=None, approx_error=None):
+    """Totals over ``by`` for the cells matching ``where``.
+
+    ``where`` maps a cube key to a value or a list of values. The result has
+    one row per group with block_full_price, num_seats, rows and orders
+    (distinct acct_id) columns. With ``approx_error`` set, orders are
+    HyperLogLog estimates with that target relative error.
+
+    Only the selected cells and their accounts are read, and they are
+    summed with NumPy rather than through a pandas groupby per call.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    cells = cube['cells']
+    positions = _select(cube, 'cells', where)
+    groups, first, n_groups = _group_codes(cells, by, positions)
+    totals = {column: cells[column].array.take(positions[first]) for column in by}
+    positions, groups = positions[groups >= 0], groups[groups >= 0]
+    sums = _group_sums([cells[measure].to_numpy()[positions] for measure in MEASURES], groups, n_groups)
+    totals.update(zip(MEASURES, sums))
+
+    # Each selected account row joins its cell's group
+    accounts = _select(cube, 'accounts', where)
+    cell_of = account_cells(cube)[accounts]
+    slot = np.minimum(np.searchsorted(positions, cell_of), max(len(positions) - 1, 0))
+    matched = (positions[slot] == cell_of) if len(positions) else np.zeros(len(cell_of), dtype=bool)
+    account_ids = cube['accounts']['acct_id'].to_numpy()[accounts[matched]]
+
+    if approx_error:
+        estimates = group_estimates(groups[slot[matched]], account_ids, n_groups, precision_for_error(approx_error))
+        totals['orders'] = estimates.round().astype('int64')
+    else:
+        # Distinct (group, account) pairs are the orders
+        account_codes = pd.factorize(account_ids)[0]
+        width = int(account_codes.max(initial=0)) + 1
+        pairs = np.unique(groups[slot[matched]] * width + account_codes)
+        totals['orders'] = np.bincount(pairs // width, minlength=n_groups).astype('int64')
+    return pd.DataFrame(totals)
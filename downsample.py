@@ -0,0 +1,86 @@
+"""Server-side downsampling of chart series to per-chart point and byte budgets.
+
+Long date ranges are reduced with Largest-Triangle-Three-Buckets (LTTB),
+which keeps the points that shape the line (peaks and troughs) rather than
+averaging them away. Budgets are per chart kind and can be overridden with
+GROUP_SALES_CHART_POINTS, e.g. "rep_daily=2000,rep_comparison=8000", and
+GROUP_SALES_CHART_KB caps the data shipped with any one chart.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default points per chart kind; a grouped chart shares its budget across groups
+CHART_POINTS = {'cumulative': 500, 'rep_daily': 1000, 'rep_comparison': 4000}
+CHART_POINTS.update({kind: int(points) for kind, points in (
+    item.split('=') for item in os.environ.get('GROUP_SALES_CHART_POINTS', '').split(',') if '=' in item)})
+
+MAX_CHART_BYTES = int(float(os.environ.get('GROUP_SALES_CHART_KB', 512)) * 1024)
+
+# LTTB always keeps both end points plus at least one point in between
+MIN_POINTS = 3
+
+
+def _numeric(values):
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy().astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return values.to_numpy(dtype=np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the ``n_out`` points LTTB keeps from the series ``x``, ``y``."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    n_out = max(n_out, MIN_POINTS)
+    x = _numeric(x)
+    y = _numeric(y)
+
+    # First and last points are kept; the interior is split into n_out - 2 buckets
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(np.intp)
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket == n_out - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_end = edges[bucket + 2]
+            next_x, next_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Keep the point forming the largest triangle with the previous pick
+        # and the next bucket's average
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def point_budget(frame, kind, max_bytes=MAX_CHART_BYTES):
+    # The chart kind's point budget, lowered if that many rows would pass max_bytes
+    points = CHART_POINTS[kind]
+    if len(frame):
+        row_bytes = frame.memory_usage(deep=True, index=False).sum() / len(frame)
+        points = min(points, int(max_bytes // max(row_bytes, 1)))
+    return max(points, MIN_POINTS)
+
+
+def downsample(frame, x, y, kind, max_bytes=MAX_CHART_BYTES):
+    """``frame`` (sorted on ``x``) reduced to the chart kind's budget."""
+    keep = lttb_indices(frame[x], frame[y], point_budget(frame, kind, max_bytes))
+    return frame.iloc[keep]
+
+
+def downsample_groups(frame, x, y, by, kind, max_bytes=MAX_CHART_BYTES):
+    """Downsample each ``by`` group of a long-format frame, sharing one budget."""
+    groups = frame.groupby(by, observed=True, sort=False).indices
+    if not groups:
+        return frame
+    per_group = point_budget(frame, kind, max_bytes) // len(groups)
+    keep = [positions[lttb_indices(frame[x].iloc[positions], frame[y].iloc[positions], per_group)]
+            for positions in groups.values()]
+    return frame.iloc[np.sort(np.concatenate(keep))]
@@ -0,0 +1,145 @@
+"""Global sidebar filters, backed by bitmap indexes over the ticket rows.
+
+For each filterable column the index holds one bitmap per value, packed 64
+rows to a word, built once per data version and cached on the cube. Sale
+dates are kept as row positions sorted by day. A selection ORs the chosen
+values' bitmaps within a column and ANDs the columns together, so it costs
+a few word-wise operations over n / 64 words rather than a comparison per
+row per column; a date range is a slice of the sorted days whose rows are
+then tested against that bitmap. The index also keeps each row's cell and
+account position in the full cube, so the filtered view's cube is
+re-totalled from the selected rows' cells instead of grouped again. Every
+page reads that view exactly like the full dataset.
+"""
+
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cube import row_positions, sub_cube
+
+# Filterable columns and their sidebar labels
+FILTER_COLUMNS = {
+    'price_code': 'Price Code',
+    'ticket_type_category': 'Ticket Type Category',
+    'acct_type_desc': 'Account Type',
+    'comp': 'Comp',
+    'paid': 'Paid',
+}
+
+
+def _pack(mask):
+    # Little-endian bits, padded to whole 64-bit words
+    packed = np.packbits(mask, bitorder='little')
+    padded = np.zeros(-(-len(packed) // 8) * 8, dtype=np.uint8)
+    padded[:len(packed)] = packed
+    return padded.view(np.uint64)
+
+
+def filter_index(dataset):
+    """Per-value bitmaps and the sorted sale days for ``dataset``, cached on its cube."""
+    cube = dataset['cube']
+    index = cube.get('filter_index')
+    if index is not None:
+        return index
+
+    data = dataset['data']
+    columns = {}
+    for column in FILTER_COLUMNS:
+        if column not in data.columns:
+            continue
+        values = data[column].astype('category')
+        codes = values.cat.codes.to_numpy()
+        used = np.unique(codes[codes >= 0])
+        columns[column] = {
+            'values': values.cat.categories[used].astype(str),
+            'bitmaps': np.stack([_pack(codes == code) for code in used]) if len(used)
+            else np.zeros((0, len(_pack(codes[:0]))), dtype=np.uint64),
+        }
+
+    days = data['add_datetime'].to_numpy().astype('datetime64[D]')
+    order = np.argsort(days, kind='stable')
+    cell_positions, account_positions = row_positions(cube, data)
+    index = cube['filter_index'] = {
+        'rows': len(data),
+        'columns': columns,
+        'date_order': order,
+        'sorted_days': days[order],
+        'cell_positions': cell_positions,
+        'account_positions': account_positions,
+    }
+    return index
+
+
+def filter_key(selections, start=None, end=None):
+    """Short stable key for a selection, or None when it selects everything."""
+    selections = {column: sorted(map(str, values)) for column, values in selections.items() if values}
+    if not selections and start is None and end is None:
+        return None
+    raw = json.dumps([selections, str(start), str(end)], sort_keys=True).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()[:8]
+
+
+def selection_bits(index, selections):
+    """Packed bitmap of the rows matching every column selection, or None for no filter.
+
+    ``selections`` maps columns to the values to keep (empty keeps all).
+    """
+    bits = None
+    for column, values in selections.items():
+        if not values or column not in index['columns']:
+            continue
+        entry = index['columns'][column]
+        rows = entry['values'].get_indexer([str(value) for value in values])
+        # No matching values reduces to all-zero words
+        column_bits = np.bitwise_or.reduce(entry['bitmaps'][rows[rows >= 0]], axis=0)
+        bits = column_bits if bits is None else bits & column_bits
+    return bits
+
+
+def _date_rows(index, start, end):
+    # Sorted positions of the rows sold between the inclusive dates, or None for no range
+    if start is None and end is None:
+        return None
+    days = index['sorted_days']
+    lo = 0 if start is None else np.searchsorted(days, np.datetime64(pd.Timestamp(start).date(), 'D'))
+    hi = len(days) if end is None else np.searchsorted(days, np.datetime64(pd.Timestamp(end).date(), 'D'),
+                                                       side='right')
+    return np.sort(index['date_order'][lo:hi])
+
+
+def selected_rows(index, selections, start=None, end=None):
+    """Positions of the rows matching every selection and the sale date range.
+
+    ``start`` and ``end`` are inclusive sale dates; either may be None.
+    """
+    bits = selection_bits(index, selections)
+    rows = _date_rows(index, start, end)
+    if bits is None:
+        return np.arange(index['rows']) if rows is None else rows
+    if rows is None:
+        return np.flatnonzero(np.unpackbits(bits.view(np.uint8), count=index['rows'], bitorder='little'))
+    # Test only the rows in the date range against the bitmap
+    return rows[(bits[rows >> 6] >> (rows & 63).astype(np.uint64)) & np.uint64(1) == 1]
+
+
+def filtered_dataset(dataset, selections, start=None, end=None):
+    """A view of ``dataset`` holding only the selected rows, with its own cube.
+
+    Returns ``dataset`` itself when nothing is filtered. The view's version
+    is the dataset's with "+<filter key>" appended, so anything cached per
+    version is cached per filter too.
+    """
+    key = filter_key(selections, start, end)
+    if key is None:
+        return dataset
+    index = filter_index(dataset)
+    rows = selected_rows(index, selections, start, end)
+    data = dataset['data'].take(rows).reset_index(drop=True)
+    cube = sub_cube(dataset['cube'], data, index['cell_positions'][rows], index['account_positions'][rows])
+    view = {name: value for name, value in dataset.items() if name not in ('shared', 'lock')}
+    return {**view, 'data': data, 'cube': cube, 'version': f"{dataset['version']}+{key}",
+            'lock': threading.Lock()}
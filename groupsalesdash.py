@@ -7,347 +7,349 @@ Original file is located at
     https://colab.research.google.com/drive/1I2G_yg98NEYHSxSBktFfqnF5LS-CvyFo
 """
 
+import json
+import time
+
 import streamlit as st
 import pandas as pd
-import altair as alt
+
+from aggregations import (REP_SERIES_LABELS, eligible_reps, event_names, event_time_series, game_totals,
+                          mean_sales_curve, rep_comparison, rep_time_series, rep_totals, sales_distribution,
+                          sorted_events, stacked_distribution, top_rep_per_game)
+from api import cached_tables, tables_zip
+from chart_cache import chart_cache
+from charts import (chart_payload, event_cumulative_chart, game_bar_chart, mean_sales_chart, pacing_board_chart,
+                    pacing_curve_chart, rep_bar_chart, rep_comparison_chart, rep_daily_chart, sales_distribution_chart,
+                    section_game_heatmap, section_row_heatmap)
+from cube import rollup
+from downsample import downsample, downsample_groups
+from filters import FILTER_COLUMNS, filter_index, filter_key, filtered_dataset
+from instrumentation import stage, start_rerun
+from pacing import PACE_GROUPS, event_days, pacing
+from refresh import export_store, partition_store
+from partitions import PARTITION_DIR, list_partitions
+from seats import blocks_overlapping, section_heatmap, section_rows, seat_index
+from shared_store import memory_report
+from timeseries import RESOLUTIONS
+
+ALL_REPS = 'All Reps (compare)'
+
+# Seasons held per process; each keeps a refresh thread polling its partitions
+SEASON_CACHE_ENTRIES = 2
 
 st.set_page_config(page_title="Group Sales Dashboard")
 st.sidebar.title("Group Sales Dashboard")
 
-@st.cache(allow_output_mutation=True)
+# Per-stage timings for this rerun, shown in the debug panel at the end
+recorder = start_rerun()
+
+@st.cache_resource
 def load_data(file_path):
     try:
-        # Read CSV with Latin-1 encoding
-        df = pd.read_csv(file_path, encoding='latin1')
+        # Typed, projected load served from the Parquet snapshot when current,
+        # with its aggregate cube and any delta exports already merged in; a
+        # background thread then reloads it whenever the export or deltas change
+        store = export_store(file_path)
     except UnicodeDecodeError as e:
         st.error(f"Error reading the file: {e}")
         return None
-    
-    if 'add_datetime' in df.columns:
-        df['add_datetime'] = pd.to_datetime(df['add_datetime'])
-    
-    return df
+
+    return store
+
+# An evicted season's store stops polling so its thread and dataset can go
+@st.cache_resource(max_entries=SEASON_CACHE_ENTRIES, on_release=lambda store: store.stop())
+def load_season(root, season):
+    # The selected season's partitions, kept current in the background
+    return partition_store(root, season)
+
+def format_age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+def show_order_error(cube, by, approx_error, where=None):
+    # Compare sketch-based order counts against the exact distinct counts
+    if approx_error is None:
+        return
+    exact = rollup(cube, by, where=where)['orders']
+    approximate = rollup(cube, by, where=where, approx_error=approx_error)['orders']
+    relative_error = (approximate - exact).abs() / exact
+    st.caption(f"Orders are HyperLogLog estimates (target ±{approx_error:.0%}). "
+               f"Observed error vs exact counts: mean {relative_error.mean():.2%}, max {relative_error.max():.2%}.")
+
+def show_chart(payload):
+    # Cached specs are JSON strings, so every render parses its own copy; the
+    # Arrow datasets go to the browser as binary rather than inline JSON
+    spec = json.loads(payload['spec'])
+    spec['datasets'] = dict(payload['datasets'])
+    st.vega_lite_chart(spec, use_container_width=True)
 
 # Specify your CSV file path
 data_file = 'group_sales1.csv'
 
-# Load data and convert to UTF-8
-data = load_data(data_file)
+# A partitioned multi-season store takes precedence over the single export
+partition_index = list_partitions(PARTITION_DIR)
+if not partition_index.empty:
+    season = st.sidebar.selectbox('Select Season', sorted(partition_index['season'].unique(), reverse=True))
+    with stage('load_partitions'):
+        store = load_season(PARTITION_DIR, season)
+    source = ('partitions', season)
+else:
+    with stage('load_data'):
+        store = load_data(data_file)
+    source = data_file
+
+# One consistent snapshot of the shared dataset for this whole rerun; the
+# refresh thread swaps in newer ones without touching this
+state = store.current() if store is not None else None
+dataset = state['dataset'] if state is not None else None
+if dataset is not None:
+    # Charts built from an older version are stale now
+    chart_cache.track(source, dataset['version'])
+
+data = dataset['data'] if dataset is not None else None
 
 if data is None:
     st.error("Failed to load data. Please check the file and try again.")
 else:
     st.write("Data has been successfully loaded.")
 
-    try:
-        data.to_csv('group_sales_utf8.csv', index=False, encoding='utf-8')
-    except Exception as e:
-        st.error(f"Error saving data: {e}")
+    st.sidebar.caption(f"Data version {state['generation']} ({dataset['version'][:8]}), loaded "
+                       f"{format_age(time.time() - state['loaded_at'])} ago in {state['seconds']:.2f}s")
+    if store.last_error:
+        st.sidebar.warning(f"Background refresh failed; showing the last good data. {store.last_error}")
+
+    load_report = dataset['report']
+    with st.sidebar.expander("Load report"):
+        st.write(f"{load_report['rows']:,} rows from {load_report['source']} in {load_report['seconds']:.2f}s, "
+                 f"{load_report['total_bytes'] / 1024:,.1f} KiB resident")
+        st.dataframe(load_report['columns'], hide_index=True)
+
+    if dataset['delta_reports']:
+        with st.sidebar.expander("Last delta refresh"):
+            delta_reports = pd.DataFrame(dataset['delta_reports'])
+            st.write(f"{delta_reports['added'].sum():,} rows added, {delta_reports['replaced'].sum():,} replaced "
+                     f"in {delta_reports['seconds'].sum():.2f}s")
+            st.dataframe(delta_reports, hide_index=True)
+
+    with st.sidebar.expander("Memory: shared vs private"):
+        tables, process = memory_report(dataset)
+        if 'shared' in dataset:
+            st.write(f"Attached to the shared copy in {dataset['shared']['dir']}; its pages are "
+                     "counted once per machine, not per session or process.")
+        else:
+            st.write("This dataset is a private copy in this process.")
+        st.dataframe(tables, hide_index=True)
+        if process:
+            st.caption("Process resident memory: " + ", ".join(
+                f"{label} {size / 2**20:,.1f} MiB" for label, size in process.items()))
 
 if data is None:
     st.error("Failed to load data. Please check the file encoding and try again.")
 else:
-    # Define mapping for event_name
-    event_name_mapping = {
-        'E240509': '5/9 v.s. Liberty',
-        'E240514L': '5/14 v.s. Fever',
-        'E240517': '5/17 v.s. Mystic',
-        'E240523': '5/23 v.s. Lynx',
-        'E240528L': '5/28 v.s. Mercury',
-        'E240531L': '5/31 v.s. Wings',
-        'E240604L': '6/4 v.s. Mystics',
-        'E240608L': '6/8 v.s. Liberty',
-        'E240610L': '6/10 v.s. Fever',
-        'E240618': '6/18 v.s. Sparks',
-        'E240628': '6/28 v.s. Dream',
-        'E240707': '7/7 v.s. Dream',
-        'E240710': '7/10 v.s. Liberty',
-        'E240714': '7/14 v.s. Mercury',
-        'E240823L': '8/23 v.s. Sky',
-        'E240901L': '9/1 v.s. Storm',
-        'E240903': '9/3 v.s. Storm',
-        'E240906L': '9/6 v.s. Aces',
-        'E240917L': '9/17 v.s. Lynx',
-        'E240919L': '9/19 v.s. Sky'
-    }
-
-    # Replace event_name with mapped values
-    data['event_name_display'] = data['event_name'].map(event_name_mapping).fillna(data['event_name'])
+    cube = dataset['cube']
 
     # Page selection
-    page = st.sidebar.selectbox('Select Page', ['Sales by Game', 'Sales Rep Performance', 'Cumulative Stats for Games', 'Cumulative Stats for Reps'])
-
-    mean_sales_data = pd.read_csv('daysdiff.csv')
+    page = st.sidebar.selectbox('Select Page', ['Sales by Game', 'Sales Rep Performance', 'Cumulative Stats for Games', 'Cumulative Stats for Reps', 'Pacing Board', 'Seat Map'])
+
+    # Orders can be counted exactly or estimated with HyperLogLog
+    approx_error = None
+    if st.sidebar.checkbox('Approximate order counts (HyperLogLog)'):
+        approx_error = st.sidebar.select_slider('Order count error bound', options=[0.01, 0.02, 0.05, 0.1],
+                                                value=0.02, format_func=lambda error: f"±{error:.0%}")
+
+    # Global filter bar: every page below reads the filtered view of the dataset
+    st.sidebar.subheader('Filters')
+    with stage('filters.index', rows=len(data)):
+        row_filters = filter_index(dataset)
+    selections = {}
+    for column, label in FILTER_COLUMNS.items():
+        values = row_filters['columns'].get(column, {}).get('values', [])
+        # A column with a single value can't narrow anything down
+        if len(values) > 1:
+            selections[column] = st.sidebar.multiselect(label, list(values), placeholder='All')
+    first_day = data['add_datetime'].min().date()
+    last_day = data['add_datetime'].max().date()
+    sale_dates = st.sidebar.date_input('Sale dates', value=(first_day, last_day), min_value=first_day,
+                                       max_value=last_day)
+    # While a range is being picked only its start is set
+    sale_dates = list(sale_dates) if isinstance(sale_dates, (tuple, list)) else [sale_dates]
+    start, end = (sale_dates + [last_day])[:2]
+    start = None if start == first_day else start
+    end = None if end == last_day else end
+    view_key = filter_key(selections, start, end)
+
+    # Cache keys of the filtered views this rerun used; re-measured at the end
+    view_cache_keys = []
+
+    def filter_view(full):
+        # The filtered view is cached per data version and selection
+        if view_key is None:
+            return full
+        view_cache_keys.append((full['version'], 'filters', view_key))
+        with stage('filters.apply', rows=len(full['data'])):
+            return chart_cache.get_or_build(view_cache_keys[-1], lambda: filtered_dataset(full, selections, start, end))
+
+    # Rep eligibility is a property of the whole dataset, not of the filtered view
+    full_cube = cube
+    dataset = filter_view(dataset)
+    data = dataset['data']
+    cube = dataset['cube']
+    if view_key is not None:
+        st.sidebar.caption(f"{len(data):,} of {row_filters['rows']:,} ticket rows match the filters")
+        if data.empty:
+            st.warning("No ticket rows match the filters.")
+            page = None
+
+    if not data.empty:
+        # The pages' summary tables for the current view, as served by api.py's /export
+        with st.sidebar.expander("Download tables"):
+            export_format = st.radio('Format', ['csv', 'parquet'], horizontal=True)
+
+            def build_archive(dataset=dataset, export_format=export_format):
+                # Runs only when the button is clicked; cached per version, filter and format
+                return chart_cache.get_or_build((dataset['version'], 'api', 'export', export_format),
+                                                lambda: tables_zip(cached_tables(dataset), export_format))
+
+            st.download_button('Download zip', build_archive, file_name=f"group-sales-{dataset['version'][:8]}-"
+                               f"{export_format}.zip", mime='application/zip', on_click='ignore')
 
-    mean_sales_data = mean_sales_data.sort_values(by='days_difference', ascending=False)
-    mean_sales_data['Cumulative Mean Sales'] = mean_sales_data['mean_sales'].cumsum()
     
     if page == 'Sales by Game':
         # Sidebar for event selection
-        event_name = st.sidebar.selectbox('Select Event', sorted(data['event_name_display'].unique()))
-    
-        # Filter data based on selected event
-        filtered_data = data[data['event_name_display'] == event_name]
-    
-        # Prepare data for time-series plots
-        # Total sales over time
-        time_series_sales = filtered_data.groupby('days_difference')['block_full_price'].sum().reset_index()
-        time_series_sales.columns = ['Days Difference', 'Total Sales']  
-        time_series_sales = time_series_sales.sort_values(by='Days Difference', ascending=False)
-    
-        # Total orders per day
-        time_series_orders = filtered_data.groupby('days_difference')['acct_id'].nunique().reset_index(name='total_orders')
-        time_series_orders.columns = ['Days Difference', 'Total Orders']  
-        time_series_orders = time_series_orders.sort_values(by='Days Difference', ascending=False)
-    
-        # Total tickets sold per day
-        time_series_tickets = filtered_data.groupby('days_difference')['num_seats'].sum().reset_index()
-        time_series_tickets.columns = ['Days Difference', 'Total Tickets Sold']  
-        time_series_tickets = time_series_tickets.sort_values(by='Days Difference', ascending=False)
-    
-        # Prepare data for cumulative time-series plots
-        # Cumulative total sales over time
-        time_series_sales['Cumulative Sales'] = time_series_sales['Total Sales'].cumsum()
-    
-        # Cumulative total orders over time
-        time_series_orders['Cumulative Orders'] = time_series_orders['Total Orders'].cumsum()
-    
-        # Cumulative total tickets sold over time
-        time_series_tickets['Cumulative Tickets Sold'] = time_series_tickets['Total Tickets Sold'].cumsum()
-    
-        # Time-series line chart using Altair for cumulative total sales
-        chart_sales = alt.Chart(time_series_sales).mark_line().encode(
-            x=alt.X('Days Difference:Q', sort='descending', title='Days Before the Game'),
-            y=alt.Y('Cumulative Sales:Q', axis=alt.Axis(title='Cumulative Sales')), 
-            tooltip=['Days Difference:Q', 'Cumulative Sales:Q']
-        ).properties(
-            title=f'Cumulative Sales Over Time for Event: {event_name}',
-            width=800,
-            height=300
-        )
-
-        chart_mean_sales = alt.Chart(mean_sales_data).mark_line(color='red').encode(
-            x=alt.X('days_difference:Q', sort='descending', title='Days Before the Game'),
-            y=alt.Y('Cumulative Mean Sales:Q'),  
-        )
+        event_name = st.sidebar.selectbox('Select Event', event_names(cube))
+
+        def build_event_charts():
+            # Cumulative sales, orders and tickets by days before the game
+            with stage('sales_by_game.aggregate', rows=len(cube['cells'])):
+                time_series_sales, time_series_orders, time_series_tickets = event_time_series(cube, event_name, approx_error)
+                # Average curve of the games already played this season
+                mean_sales_data = mean_sales_curve(cube)
+
+            # Keep the line shapes within the cumulative charts' point budget
+            time_series_sales = downsample(time_series_sales, 'Days Difference', 'Cumulative Sales', 'cumulative')
+            time_series_orders = downsample(time_series_orders, 'Days Difference', 'Cumulative Orders', 'cumulative')
+            time_series_tickets = downsample(time_series_tickets, 'Days Difference', 'Cumulative Tickets Sold', 'cumulative')
+
+            with stage('sales_by_game.charts'):
+                chart_sales = event_cumulative_chart(time_series_sales, 'Cumulative Sales', event_name)
+                chart_mean_sales = mean_sales_chart(mean_sales_data)
+                chart_orders = event_cumulative_chart(time_series_orders, 'Cumulative Orders', event_name, color='orange')
+                chart_tickets = event_cumulative_chart(time_series_tickets, 'Cumulative Tickets Sold', event_name, color='green')
+                return [chart_payload(chart_sales + chart_mean_sales), chart_payload(chart_orders), chart_payload(chart_tickets)]
+
+        spec_sales, spec_orders, spec_tickets = chart_cache.get_or_build(
+            (dataset['version'], page, event_name, approx_error), build_event_charts)
 
-    
-        # Time-series line chart using Altair for cumulative total orders
-        chart_orders = alt.Chart(time_series_orders).mark_line(color='orange').encode(
-            x=alt.X('Days Difference:Q', sort='descending', title='Days Before the Game'),
-            y=alt.Y('Cumulative Orders:Q', axis=alt.Axis(title='Cumulative Orders')),  
-            tooltip=['Days Difference:Q', 'Cumulative Orders:Q']
-        ).properties(
-            title=f'Cumulative Orders Over Time for Event: {event_name}',
-            width=800,
-            height=300
-        )
-    
-        # Time-series line chart using Altair for cumulative total tickets sold
-        chart_tickets = alt.Chart(time_series_tickets).mark_line(color='green').encode(
-            x=alt.X('Days Difference:Q', sort='descending', title='Days Before the Game'),
-            y=alt.Y('Cumulative Tickets Sold:Q', axis=alt.Axis(title='Cumulative Tickets Sold')),  
-            tooltip=['Days Difference:Q', 'Cumulative Tickets Sold:Q']
-        ).properties(
-            title=f'Cumulative Tickets Sold Over Time for Event: {event_name}',
-            width=800,
-            height=300
-        )
-    
         # Display the cumulative charts
-        st.altair_chart(chart_sales + chart_mean_sales, use_container_width=True)
-        st.altair_chart(chart_orders, use_container_width=True)
-        st.altair_chart(chart_tickets, use_container_width=True)
+        with stage('sales_by_game.render'):
+            show_chart(spec_sales)
+            show_chart(spec_orders)
+            show_order_error(cube, ['days_difference'], approx_error, where={'event_name_display': event_name})
+            show_chart(spec_tickets)
 
-
-
-    
     elif page == 'Sales Rep Performance':
-        # Filter representatives with at least 30 rows
-        reps_with_enough_rows = data['acct_rep_full_name'].value_counts()[data['acct_rep_full_name'].value_counts() >= 30].index.tolist()
-
-        reps_to_exclude = ["Dan Tamburro", "Mitch Conrad", "Garet Griffin"]
-    
-        reps_with_enough_rows = [rep for rep in reps_with_enough_rows if rep not in reps_to_exclude]
+        # Representatives with at least 30 rows, minus the excluded ones
+        reps_with_enough_rows = eligible_reps(full_cube)
 
         # Sidebar for sales rep selection
-        sales_rep = st.sidebar.selectbox('Select Sales Representative', sorted(reps_with_enough_rows))
-
-        # Filter data based on selected sales rep
-        filtered_rep_data = data[data['acct_rep_full_name'] == sales_rep]
-
-        if filtered_rep_data.empty:
+        sales_rep = st.sidebar.selectbox('Select Sales Representative', sorted(reps_with_enough_rows) + [ALL_REPS])
+        resolution = st.sidebar.selectbox('Time Resolution', list(RESOLUTIONS))
+
+        def build_rep_charts():
+            # Series over the rep's full date range at the chosen resolution
+            with stage('rep_performance.aggregate', rows=len(cube['cells'])):
+                rep_series = rep_time_series(cube, sales_rep, approx_error, resolution)
+            if rep_series is None:
+                return None
+
+            with stage('rep_performance.charts'):
+                charts = [rep_daily_chart(downsample(frame, 'Date', label, 'rep_daily'), label, sales_rep, color=color)
+                          for frame, label, color in zip(rep_series, REP_SERIES_LABELS.values(), [None, 'orange', 'green'])]
+                return {'specs': [chart_payload(chart) for chart in charts],
+                        'totals': [frame.iloc[:, 1].sum() for frame in rep_series]}
+
+        def build_comparison_charts():
+            # Every eligible rep's series on one shared date axis
+            specs = []
+            for column, label in REP_SERIES_LABELS.items():
+                with stage('rep_performance.compare', rows=len(cube['cells'])):
+                    comparison = rep_comparison(cube, reps_with_enough_rows, column, approx_error, resolution)
+                    comparison = downsample_groups(comparison, 'Date', label, 'acct_rep_full_name', 'rep_comparison')
+                    specs.append(chart_payload(rep_comparison_chart(comparison, label, f'{resolution} {label} by Rep')))
+            return specs
+
+        rep_charts = chart_cache.get_or_build((dataset['version'], page, sales_rep, resolution, approx_error),
+                                              build_comparison_charts if sales_rep == ALL_REPS else build_rep_charts)
+
+        if sales_rep == ALL_REPS:
+            for spec in rep_charts:
+                show_chart(spec)
+        elif rep_charts is None:
             st.warning(f"No data available for {sales_rep}. Please select another sales representative.")
         else:
-            # Prepare data for sales rep performance charts
-            # Total sales over time
-            rep_time_series_sales = filtered_rep_data.groupby(filtered_rep_data['add_datetime'].dt.date)['block_full_price'].sum().reset_index()
-            rep_time_series_sales.columns = ['Date', 'Total Sales']  
-
-            # Total orders per day
-            rep_time_series_orders = filtered_rep_data.groupby(filtered_rep_data['add_datetime'].dt.date)['acct_id'].nunique().reset_index(name='total_orders')
-            rep_time_series_orders.columns = ['Date', 'Total Orders']  
-
-            # Total tickets sold per day
-            rep_time_series_tickets = filtered_rep_data.groupby(filtered_rep_data['add_datetime'].dt.date)['num_seats'].sum().reset_index()
-            rep_time_series_tickets.columns = ['Date', 'Total Tickets Sold']  
-
-            full_date_range = pd.date_range(start=rep_time_series_sales['Date'].min(),
-                                            end=rep_time_series_sales['Date'].max())
-
-            rep_time_series_sales = rep_time_series_sales.set_index('Date').reindex(full_date_range).fillna(0).reset_index()
-
-            rep_time_series_sales.columns = ['Date', 'Total Sales']
-
-            # Time-series line chart using Altair for sales rep total sales
-            rep_chart_sales = alt.Chart(rep_time_series_sales).mark_line().encode(
-                x='Date:T',  
-                y=alt.Y('Total Sales:Q', axis=alt.Axis(title='Total Sales')),  
-                tooltip=['Date:T', 'Total Sales:Q']
-            ).properties(
-                title=f'Total Sales Over Time for {sales_rep}',
-                width=800,
-                height=300
-            )
-            full_date_range = pd.date_range(start=rep_time_series_orders['Date'].min(),
-                                            end=rep_time_series_orders['Date'].max())
-
-            rep_time_series_orders = rep_time_series_orders.set_index('Date').reindex(full_date_range).fillna(0).reset_index()
-
-            rep_time_series_orders.columns = ['Date', 'Total Orders']
-
-            # Time-series line chart using Altair for sales rep total orders
-            rep_chart_orders = alt.Chart(rep_time_series_orders).mark_line(color='orange').encode(
-                x='Date:T',  # Assuming index is the new date column after reindexing
-                y=alt.Y('Total Orders:Q', axis=alt.Axis(title='Total Orders')),  
-                tooltip=['Date:T', 'Total Orders:Q']
-            ).properties(
-                title=f'Total Orders Over Time for {sales_rep}',
-                width=800,
-                height=300
-            )
-
-            full_date_range = pd.date_range(start=rep_time_series_tickets['Date'].min(),
-                                            end=rep_time_series_tickets['Date'].max())
-
-            rep_time_series_tickets = rep_time_series_tickets.set_index('Date').reindex(full_date_range).fillna(0).reset_index()
-            
-            rep_time_series_tickets.columns = ['Date', 'Total Tickets Sold']
-
-
-            # Time-series line chart using Altair for sales rep total tickets sold
-            rep_chart_tickets = alt.Chart(rep_time_series_tickets).mark_line(color='green').encode(
-                x='Date:T',  # Rename x-axis
-                y=alt.Y('Total Tickets Sold:Q', axis=alt.Axis(title='Total Tickets Sold')),  
-                tooltip=['Date:T', 'Total Tickets Sold:Q']
-            ).properties(
-                title=f'Total Tickets Sold Over Time for {sales_rep}',
-                width=800,
-                height=300
-            )
+            spec_sales, spec_orders, spec_tickets = rep_charts['specs']
+            total_rep_sales, total_rep_orders, total_rep_tickets = rep_charts['totals']
 
             # Display the charts with appropriate labels
-            st.altair_chart(rep_chart_sales, use_container_width=True)
-            if not rep_time_series_sales.empty:
-                total_rep_sales = rep_time_series_sales['Total Sales'].sum()
-                st.info(f"{sales_rep} has reached ${total_rep_sales:.2f} in total group sales over this time.")
+            show_chart(spec_sales)
+            st.info(f"{sales_rep} has reached ${total_rep_sales:.2f} in total group sales over this time.")
             
-            st.altair_chart(rep_chart_orders, use_container_width=True)
-            if not rep_time_series_orders.empty:
-                total_rep_orders = rep_time_series_orders['Total Orders'].sum()
-                st.info(f"{sales_rep} has accumulated {total_rep_orders} total group orders over this time.")
+            show_chart(spec_orders)
+            st.info(f"{sales_rep} has accumulated {total_rep_orders} total group orders over this time.")
+            show_order_error(cube, ['add_date'], approx_error, where={'acct_rep_full_name': sales_rep})
                 
-            st.altair_chart(rep_chart_tickets, use_container_width=True)
-            if not rep_time_series_tickets.empty:
-                total_rep_tickets = rep_time_series_tickets['Total Tickets Sold'].sum()
-                st.info(f"{sales_rep} has sold {total_rep_tickets} total group tickets over this time.")
+            show_chart(spec_tickets)
+            st.info(f"{sales_rep} has sold {total_rep_tickets} total group tickets over this time.")
 
     elif page == 'Cumulative Stats for Games':
             game_cumulative_option = st.sidebar.selectbox('Select Cumulative Graph', 
                                                           ['Cumulative Group Sales ($) for Each Game', 
                                                            'Cumulative Group Orders for Each Game', 
                                                            'Cumulative Group Tickets for Each Game'])
-        
-            sorted_events = [event_name_mapping[key] for key in event_name_mapping.keys() if key in data['event_name'].unique()]
+
+            def game_chart(column, title, table_columns):
+                def build():
+                    # Per-game totals in schedule order
+                    with stage('cumulative_games.aggregate', rows=len(cube['cells'])):
+                        games = game_totals(cube, approx_error)
+                    table = games[['event_name_display', column]]
+                    spec = chart_payload(game_bar_chart(table, column, title, sorted_events(cube)))
+                    table.columns = table_columns
+                    return {'spec': spec, 'table': table}
+                return chart_cache.get_or_build((dataset['version'], page, game_cumulative_option, approx_error), build)
         
             if game_cumulative_option == 'Cumulative Group Sales ($) for Each Game':
-                # Calculate cumulative sales by game
-                cumulative_sales_by_game = data.groupby('event_name_display')['block_full_price'].sum().reset_index()
-                cumulative_sales_by_game = cumulative_sales_by_game.sort_values(by='event_name_display', key=lambda x: x.map(lambda name: sorted_events.index(name)))
-        
-                # Bar chart for cumulative sales by game
-                bar_chart_game_sales = alt.Chart(cumulative_sales_by_game).mark_bar().encode(
-                    x=alt.X('event_name_display', sort=sorted_events, axis=alt.Axis(title='Game')),
-                    y=alt.Y('block_full_price', axis=alt.Axis(title='Cumulative Group Sales ($)')),
-                    tooltip=['event_name_display', 'block_full_price']
-                ).properties(
-                    width=800,
-                    height=400
-                )
-        
-                # Display the chart
-                st.altair_chart(bar_chart_game_sales, use_container_width=True)
+                cumulative_sales_by_game = game_chart('block_full_price', 'Cumulative Group Sales ($)', ['Event', 'Total Sales ($)'])
+                show_chart(cumulative_sales_by_game['spec'])
         
                 # Table for cumulative sales by game
                 st.write("Table for Cumulative Group Sales ($) for Each Game")
-                cumulative_sales_by_game.columns = ['Event', 'Total Sales ($)']
-                st.write(cumulative_sales_by_game)
+                st.write(cumulative_sales_by_game['table'])
         
             elif game_cumulative_option == 'Cumulative Group Orders for Each Game':
-                # Group by event and count unique acct_id values
-                unique_orders = data.groupby('event_name_display')['acct_id'].nunique().reset_index(name='total_orders')
-                unique_orders = unique_orders.sort_values(by='event_name_display', key=lambda x: x.map(lambda name: sorted_events.index(name)))
-            
-                # Bar chart for cumulative orders by game
-                bar_chart_game_orders = alt.Chart(unique_orders).mark_bar().encode(
-                    x=alt.X('event_name_display', sort=sorted_events, axis=alt.Axis(title='Game')),
-                    y=alt.Y('total_orders', axis=alt.Axis(title='Cumulative Group Orders')),
-                    tooltip=['event_name_display', 'total_orders']
-                ).properties(
-                    width=800,
-                    height=400
-                )
-            
-                # Display the chart
-                st.altair_chart(bar_chart_game_orders, use_container_width=True)
+                unique_orders = game_chart('total_orders', 'Cumulative Group Orders', ['Event', 'Total Orders'])
+                show_chart(unique_orders['spec'])
+                show_order_error(cube, ['event_name_display'], approx_error)
             
                 # Table for cumulative orders by game
                 st.write("Table for Cumulative Group Orders for Each Game")
-                unique_orders.columns = ['Event', 'Total Orders']
-                st.write(unique_orders)
-
-
+                st.write(unique_orders['table'])
 
             elif game_cumulative_option == 'Cumulative Group Tickets for Each Game':
-                # Calculate cumulative tickets sold by game
-                cumulative_tickets_by_game = data.groupby('event_name_display')['num_seats'].sum().reset_index()
-                cumulative_tickets_by_game = cumulative_tickets_by_game.sort_values(by='event_name_display', key=lambda x: x.map(lambda name: sorted_events.index(name)))
-        
-                # Bar chart for cumulative tickets sold by game
-                bar_chart_game_tickets = alt.Chart(cumulative_tickets_by_game).mark_bar().encode(
-                    x=alt.X('event_name_display', sort=sorted_events, axis=alt.Axis(title='Game')),
-                    y=alt.Y('num_seats', axis=alt.Axis(title='Cumulative Group Tickets')),
-                    tooltip=['event_name_display', 'num_seats']
-                ).properties(
-                    width=800,
-                    height=400
-                )
-        
-                # Display the chart
-                st.altair_chart(bar_chart_game_tickets, use_container_width=True)
+                cumulative_tickets_by_game = game_chart('num_seats', 'Cumulative Group Tickets', ['Event', 'Total Tickets'])
+                show_chart(cumulative_tickets_by_game['spec'])
         
                 # Table for cumulative tickets sold by game
                 st.write("Table for Cumulative Group Tickets for Each Game")
-                cumulative_tickets_by_game.columns = ['Event', 'Total Tickets']
-                st.write(cumulative_tickets_by_game)
+                st.write(cumulative_tickets_by_game['table'])
     
     elif page == 'Cumulative Stats for Reps':
-        # Filter representatives with at least 30 orders
-        reps_with_enough_orders = data['acct_rep_full_name'].value_counts()[data['acct_rep_full_name'].value_counts() >= 30].index.tolist()
+        # Representatives with at least 30 rows, minus the excluded ones
+        reps_with_enough_orders = eligible_reps(full_cube)
 
-        reps_to_exclude = ["Dan Tamburro", "Mitch Conrad", "Garet Griffin"]
-        
-        reps_with_enough_orders = [rep for rep in reps_with_enough_orders if rep not in reps_to_exclude]
         
         # Sidebar for cumulative graphs selection
         cumulative_option = st.sidebar.selectbox('Select Cumulative Graph', 
@@ -355,128 +357,157 @@ else:
                                                   'Cumulative Group Ticket Orders by Rep', 
                                                   'Cumulative Group Tickets Sold by Rep',
                                                 'Sales Distribution by Rep for Each Game'])
+
+        def rep_chart(column, title, table_columns):
+            def build():
+                # Per-rep totals from the cube
+                with stage('cumulative_reps.aggregate', rows=len(cube['cells'])):
+                    reps = rep_totals(cube, reps_with_enough_orders, approx_error)
+                table = reps[['acct_rep_full_name', column]].sort_values(by=column, ascending=False)
+                spec = chart_payload(rep_bar_chart(table, column, title))
+                table.columns = table_columns
+                return {'spec': spec, 'table': table}
+            return chart_cache.get_or_build((dataset['version'], page, cumulative_option, approx_error), build)
     
         if cumulative_option == 'Cumulative Group Sales ($) by Rep':
-            # Calculate cumulative sales by sales rep
-            cumulative_sales_by_rep = data.groupby('acct_rep_full_name')['block_full_price'].sum().reset_index()
-            cumulative_sales_by_rep = cumulative_sales_by_rep[cumulative_sales_by_rep['acct_rep_full_name'].isin(reps_with_enough_orders)]
-            cumulative_sales_by_rep = cumulative_sales_by_rep.sort_values(by='block_full_price', ascending=False)
-    
-            # Bar chart for cumulative sales by rep
-            bar_chart_sales = alt.Chart(cumulative_sales_by_rep).mark_bar().encode(
-                x=alt.X('acct_rep_full_name', sort='-y', axis=alt.Axis(title='Sales Representative')),
-                y=alt.Y('block_full_price', axis=alt.Axis(title='Cumulative Sales ($)')),
-                tooltip=['acct_rep_full_name', 'block_full_price']
-            ).properties(
-                width=800,
-                height=400
-            )
-    
-            # Display the chart
-            st.altair_chart(bar_chart_sales, use_container_width=True)
+            cumulative_sales_by_rep = rep_chart('block_full_price', 'Cumulative Sales ($)', ['Sales Representative', 'Total Sales ($)'])
+            show_chart(cumulative_sales_by_rep['spec'])
 
             st.write("Table for Cumulative Group Sales ($) by Rep")
-            cumulative_sales_by_rep.columns = ['Sales Representative', 'Total Sales ($)']
-            st.write(cumulative_sales_by_rep)
+            st.write(cumulative_sales_by_rep['table'])
     
         elif cumulative_option == 'Cumulative Group Ticket Orders by Rep':
-            # Calculate cumulative ticket orders by sales rep
-            unique_orders_by_rep = data.groupby('acct_rep_full_name')['acct_id'].nunique().reset_index(name='total_orders')
-        
-            # Filter out reps with enough orders if needed
-            unique_orders_by_rep = unique_orders_by_rep[unique_orders_by_rep['acct_rep_full_name'].isin(reps_with_enough_orders)]
-        
-            # Sort by total orders descending
-            unique_orders_by_rep = unique_orders_by_rep.sort_values(by='total_orders', ascending=False)
-        
-            # Bar chart for cumulative ticket orders by rep
-            bar_chart_orders = alt.Chart(unique_orders_by_rep).mark_bar().encode(
-                x=alt.X('acct_rep_full_name', sort='-y', axis=alt.Axis(title='Sales Representative')),
-                y=alt.Y('total_orders', axis=alt.Axis(title='Cumulative Ticket Orders')),
-                tooltip=['acct_rep_full_name', 'total_orders']
-            ).properties(
-                width=800,
-                height=400
-            )
-        
-            # Display the chart
-            st.altair_chart(bar_chart_orders, use_container_width=True)
+            unique_orders_by_rep = rep_chart('total_orders', 'Cumulative Ticket Orders', ['Sales Representative', 'Total Orders'])
+            show_chart(unique_orders_by_rep['spec'])
+            show_order_error(cube, ['acct_rep_full_name'], approx_error, where={'acct_rep_full_name': reps_with_enough_orders})
         
             # Table for cumulative ticket orders by rep
             st.write("Table for Cumulative Group Ticket Orders by Rep")
-            unique_orders_by_rep.columns = ['Sales Representative', 'Total Orders']
-            st.write(unique_orders_by_rep)
-
-
+            st.write(unique_orders_by_rep['table'])
     
         elif cumulative_option == 'Cumulative Group Tickets Sold by Rep':
-            # Calculate cumulative tickets sold by sales rep
-            cumulative_tickets_sold_by_rep = data.groupby('acct_rep_full_name')['num_seats'].sum().reset_index()
-            cumulative_tickets_sold_by_rep = cumulative_tickets_sold_by_rep[cumulative_tickets_sold_by_rep['acct_rep_full_name'].isin(reps_with_enough_orders)]
-            cumulative_tickets_sold_by_rep = cumulative_tickets_sold_by_rep.sort_values(by='num_seats', ascending=False)
-    
-            # Bar chart for cumulative tickets sold by rep
-            bar_chart_tickets = alt.Chart(cumulative_tickets_sold_by_rep).mark_bar().encode(
-                x=alt.X('acct_rep_full_name', sort='-y', axis=alt.Axis(title='Sales Representative')),
-                y=alt.Y('num_seats', axis=alt.Axis(title='Cumulative Tickets Sold')),
-                tooltip=['acct_rep_full_name', 'num_seats']
-            ).properties(
-                width=800,
-                height=400
-            )
-    
-            # Display the chart
-            st.altair_chart(bar_chart_tickets, use_container_width=True)
+            cumulative_tickets_sold_by_rep = rep_chart('num_seats', 'Cumulative Tickets Sold', ['Sales Representative', 'Total Tickets Sold'])
+            show_chart(cumulative_tickets_sold_by_rep['spec'])
 
             st.write("Table for Cumulative Group Tickets Sold by Rep")
-            cumulative_tickets_sold_by_rep.columns = ['Sales Representative', 'Total Tickets Sold']
-            st.write(cumulative_tickets_sold_by_rep)        
+            st.write(cumulative_tickets_sold_by_rep['table'])
 
         elif cumulative_option == 'Sales Distribution by Rep for Each Game':
-            # Filter out representatives with fewer than 30 orders
-            reps_with_enough_orders = data['acct_rep_full_name'].value_counts()[data['acct_rep_full_name'].value_counts() >= 30].index.tolist()
-            reps_to_exclude = ["Dan Tamburro", "Mitch Conrad", "Garet Griffin"]
-        
-            reps_with_enough_orders = [rep for rep in reps_with_enough_orders if rep not in reps_to_exclude]
-
-            # Prepare data for sales distribution by rep for each game
-            sales_distribution = data[data['acct_rep_full_name'].isin(reps_with_enough_orders)]
-            sales_distribution = sales_distribution.groupby(['event_name_display', 'acct_rep_full_name'])['block_full_price'].sum().reset_index()
-        
-            # Calculate percentage of sales for each rep for each game
-            sales_distribution['sales_percentage'] = sales_distribution.groupby('event_name_display')['block_full_price'].transform(lambda x: (x / x.sum()) * 100)
-
-
-            event_order = [
-                            '5/9 v.s. Liberty', '5/14 v.s. Fever', '5/17 v.s. Mystic', '5/23 v.s. Lynx', '5/28 v.s. Mercury', '5/31 v.s. Wings', '6/4 v.s. Mystics', '6/8 v.s. Liberty', '6/10 v.s. Fever', '6/18 v.s. Sparks', '6/28 v.s. Dream', '7/7 v.s. Dream', 
-                            '7/10 v.s. Liberty', '7/14 v.s. Mercury', '8/23 v.s. Sky', '9/1 v.s. Storm', '9/3 v.s. Storm', '9/6 v.s. Aces', '9/17 v.s. Lynx', '9/19 v.s. Sky'
-                        ]
-
-
+            def build_distribution():
+                # Each rep's share of sales for every game
+                with stage('sales_distribution.aggregate', rows=len(cube['cells'])):
+                    distribution = sales_distribution(cube, reps_with_enough_orders)
+                with stage('sales_distribution.charts', rows=len(distribution)):
+                    spec = chart_payload(sales_distribution_chart(stacked_distribution(distribution), sorted_events(cube)))
+
+                # Find the top salesman for each game
+                return {'spec': spec, 'top_reps': top_rep_per_game(distribution).to_html(index=False)}
+
+            # Only the sales figures feed this chart, so the order-count option isn't part of the key
+            sales_shares = chart_cache.get_or_build((dataset['version'], page, cumulative_option), build_distribution)
+            show_chart(sales_shares['spec'])
+            st.markdown(sales_shares['top_reps'], unsafe_allow_html=True)
+
+    elif page == 'Pacing Board':
+        # Upcoming games paced against the curves of games already played
+        pace_by = st.sidebar.selectbox('Pace Games Against', PACE_GROUPS)
+        last_sale = event_days(cube)['last_sale'].date()
+        as_of = st.sidebar.date_input('Pace as of', value=last_sale, min_value=cube['cells']['add_date'].min().date(),
+                                      max_value=last_sale)
+
+        def build_pacing():
+            with stage('pacing.project', rows=len(cube['cells'])):
+                paced = pacing(cube, as_of, pace_by)
+            with stage('pacing.charts'):
+                charts = {'curves_chart': chart_payload(pacing_curve_chart(paced['curves']))}
+                if 'Projected Sales' in paced['board']:
+                    charts['board_chart'] = chart_payload(pacing_board_chart(paced['board']))
+            return {**paced, **charts}
+
+        paced = chart_cache.get_or_build((dataset['version'], page, as_of, pace_by), build_pacing)
+        board = paced['board']
+
+        st.write(f"Paced as of {as_of:%B %d, %Y} against {paced['history']} games already played.")
+        if board.empty:
+            st.info("No upcoming games as of this date.")
+        elif 'board_chart' not in paced:
+            st.info("No games have been played yet, so there is no history to pace against.")
+        else:
+            show_chart(paced['board_chart'])
+            money = '${:,.0f}'
+            st.dataframe(board.style.format({'Game Date': '{:%Y-%m-%d}', 'Sales to Date': money, 'Typical to Date': money,
+                                             'Pace': '{:.0%}', 'Projected Sales': money, 'Low (P10)': money,
+                                             'High (P90)': money}, na_rep='-'), hide_index=True)
+        show_chart(paced['curves_chart'])
+
+    elif page == 'Seat Map':
+        # Where group seats are, from the seat-block index built once per data version
+        with stage('seat_map.index', rows=len(data)):
+            seat_blocks = seat_index(dataset)
+        if seat_blocks['unplaced']:
+            st.caption(f"{seat_blocks['unplaced']:,} ticket rows without a section, row or seat number "
+                       "are left off the seat map.")
+        seat_view = st.sidebar.selectbox('Seat View', ['One game by section and row', 'All games by section'])
+        max_days_out = int(cube['cells']['days_difference'].max()) if len(cube['cells']) else 0
+        min_days_out = 0
+        if max_days_out > 0:
+            # A view of game-day sales only has nothing to slide over
+            min_days_out = st.sidebar.slider('Booked at least this many days before the game', 0, max_days_out, 0)
+
+        if seat_view == 'One game by section and row':
+            event_name = st.sidebar.selectbox('Select Event', sorted_events(cube))
+
+            def build_seat_rows():
+                with stage('seat_map.query'):
+                    table = section_rows(seat_blocks, event_name, min_days_out)
+                with stage('seat_map.chart'):
+                    spec = chart_payload(section_row_heatmap(table, event_name, list(seat_blocks['sections']),
+                                                             list(seat_blocks['rows'])))
+                return {'spec': spec, 'table': table}
+
+            seat_map = chart_cache.get_or_build((dataset['version'], page, event_name, min_days_out), build_seat_rows)
+        else:
+            def build_seat_heatmap():
+                with stage('seat_map.query'):
+                    table = section_heatmap(seat_blocks, min_days_out)
+                with stage('seat_map.chart'):
+                    spec = chart_payload(section_game_heatmap(table, sorted_events(cube), list(seat_blocks['sections'])))
+                return {'spec': spec, 'table': table}
 
-            # Bar chart for sales distribution by rep for each game
-            bar_chart_sales_dist = alt.Chart(sales_distribution).mark_bar().encode(
-                x=alt.X('event_name_display:N', sort=event_order, axis=alt.Axis(title='Game')),
-                y=alt.Y('sales_percentage:Q', stack='normalize', axis=alt.Axis(format='%'), title='Sales Percentage'),
-                color=alt.Color('acct_rep_full_name:N', legend=alt.Legend(title='Account Rep')),
-                order=alt.Order('sales_percentage:Q', sort='descending'),
-                tooltip=['event_name_display:N', 'acct_rep_full_name:N', 'block_full_price:Q', 'sales_percentage:Q']
-            ).properties(
-                width=800,
-                height=400
-            )
-        
-            # Display the chart
-            st.altair_chart(bar_chart_sales_dist, use_container_width=True)
+            seat_map = chart_cache.get_or_build((dataset['version'], page, min_days_out), build_seat_heatmap)
 
-            # Find the top salesman for each game
-            top_salesman_per_game = sales_distribution.loc[sales_distribution.groupby('event_name_display')['block_full_price'].idxmax()]
-            
-            # Create a DataFrame for the table
-            top_salesman_table = top_salesman_per_game[['event_name_display', 'acct_rep_full_name']]
-            top_salesman_table.columns = ['Game', 'Top Rep']
-            top_salesman_table = top_salesman_table.reset_index(drop=True)
-            html_table = top_salesman_table.to_html(index=False)
-            st.markdown(html_table, unsafe_allow_html=True)
-            
-        
+        if seat_map['table'].empty:
+            st.info("No group seats were booked that far before the game.")
+        else:
+            show_chart(seat_map['spec'])
+            st.dataframe(seat_map['table'].style.format({'Sales': '${:,.0f}', 'Density': '{:.0%}',
+                                                         'Avg Days Out': '{:.0f}'}), hide_index=True)
+
+        with st.expander("Look up a seat range"):
+            lookup_columns = st.columns(5)
+            lookup_event = lookup_columns[0].selectbox('Game', sorted_events(cube))
+            lookup_section = lookup_columns[1].selectbox('Section', list(seat_blocks['sections']))
+            lookup_row = lookup_columns[2].selectbox('Row', list(seat_blocks['rows']))
+            first_seat = lookup_columns[3].number_input('First seat', min_value=1, value=1)
+            last_seat = lookup_columns[4].number_input('Last seat', min_value=1, value=10)
+            positions = blocks_overlapping(seat_blocks, lookup_event, lookup_section, lookup_row, first_seat, last_seat)
+            if len(positions):
+                block_columns = ['acct_rep_full_name', 'acct_id', 'section_name', 'row_name', 'seat_num', 'last_seat',
+                                 'num_seats', 'block_full_price', 'add_datetime', 'days_difference']
+                st.dataframe(data.iloc[positions][[column for column in block_columns if column in data.columns]],
+                             hide_index=True)
+            else:
+                st.write("No group blocks hold those seats.")
+
+    # The pages may have attached derived indexes to the views' cubes; count them in the cache budget
+    for view_cache_key in view_cache_keys:
+        chart_cache.remeasure(view_cache_key)
+
+# Debug panel: where this rerun's time and memory went
+with st.sidebar.expander("Debug: stage timings"):
+    st.write(f"Rerun took {recorder.total_seconds() * 1000:,.0f} ms")
+    cache_stats = chart_cache.stats()
+    st.write(f"Chart cache: {cache_stats['entries']} entries, {cache_stats['bytes'] / 1024:,.1f} KiB, "
+             f"{cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['evictions']} evictions")
+    st.dataframe(pd.DataFrame(recorder.table()), hide_index=True)
+recorder.log()
@@ -0,0 +1,74 @@
+"""Vectorized HyperLogLog estimates for approximate distinct account counts.
+
+Each account is hashed once; the hash picks one of 2 ** p registers and a
+rank. A group's sketch is the maximum rank per register over its accounts.
+Only the registers a group actually sets are kept, as (group, register)
+pairs, so memory follows the number of accounts rather than groups x 2 ** p,
+and sketches are built at the grain being counted rather than per cube cell.
+"""
+
+import math
+
+import numpy as np
+
+MIN_PRECISION = 4
+# 2 ** 14 registers is about ±0.8%; finer bounds buy little over exact counts
+MAX_PRECISION = 14
+
+
+def precision_for_error(error):
+    # Standard error of HyperLogLog is about 1.04 / sqrt(2 ** p)
+    precision = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(precision, MIN_PRECISION), MAX_PRECISION)
+
+
+def standard_error(precision):
+    return 1.04 / math.sqrt(1 << precision)
+
+
+def hash_values(values):
+    # splitmix64 finalizer; spreads sequential account ids over 64 bits
+    h = np.asarray(values).astype(np.uint64)
+    with np.errstate(over='ignore'):
+        h = h + np.uint64(0x9E3779B97F4A7C15)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        h = h ^ (h >> np.uint64(31))
+    return h
+
+
+def _hash_registers(values, precision):
+    # Register index and rank (position of the leftmost set bit in the
+    # remaining bits) of each value's hash
+    h = hash_values(values)
+    index = (h >> np.uint64(64 - precision)).astype(np.int64)
+    remaining = h & np.uint64((1 << (64 - precision)) - 1)
+    _, bit_length = np.frexp(remaining.astype(np.float64))
+    return index, (64 - precision - bit_length + 1).astype(np.int64)
+
+
+def group_estimates(group_codes, values, n_groups, precision):
+    """Distinct count estimate of ``values`` for each group code in ``0..n_groups-1``.
+
+    Registers are kept sparse: one entry per (group, register) that some
+    value sets, holding its maximum rank. Unset registers count as zero.
+    """
+    m = 1 << precision
+    index, rank = _hash_registers(values, precision)
+    keys = np.asarray(group_codes, dtype=np.int64) * m + index
+    order = np.lexsort((rank, keys))
+    keys, rank = keys[order], rank[order]
+    # The last entry of each key run holds its maximum rank
+    last = np.r_[keys[1:] != keys[:-1], True] if len(keys) else np.zeros(0, dtype=bool)
+    groups = keys[last] // m
+
+    inverse_sum = np.bincount(groups, weights=np.exp2(-rank[last].astype(np.float64)), minlength=n_groups)
+    zeros = m - np.bincount(groups, minlength=n_groups)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / (inverse_sum + zeros)
+
+    # Linear counting for small cardinalities, where raw HLL is biased
+    with np.errstate(divide='ignore'):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    small = (raw <= 2.5 * m) & (zeros > 0)
+    return np.where(small, linear, raw)
@@ -0,0 +1,160 @@
+"""Incremental append of hourly ticketing delta exports.
+
+Delta files use the same layout as group_sales1.csv and are dropped into
+``deltas/``. Each one is merged into the loaded dataset by seat, replacing
+any ticket already on file for the same seat, and the aggregate cube is
+updated from the delta rows alone. The merged frame is written back to the
+snapshot cache so a cold start only replays deltas it has not seen.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from cube import build_cube, update_cube
+from ingest import SNAPSHOT_SALT, concat_sales, load_sales, read_normalized
+from snapshot_cache import (file_fingerprint, read_snapshot, read_snapshot_metadata,
+                            snapshot_path, write_snapshot)
+
+DELTA_DIR = os.environ.get('GROUP_SALES_DELTA_DIR', 'deltas')
+
+# A ticket is identified by its seat; a later export for the same seat wins
+SEAT_KEY = ['event_name', 'section_name', 'row_name', 'seat_num']
+
+
+def list_deltas(delta_dir=DELTA_DIR):
+    # Exports are named so that lexical order is arrival order
+    if not os.path.isdir(delta_dir):
+        return []
+    return [os.path.join(delta_dir, name) for name in sorted(os.listdir(delta_dir))
+            if name.endswith('.csv')]
+
+
+def delta_id(path):
+    return f"{os.path.basename(path)}:{file_fingerprint(path)['key']}"
+
+
+def dataset_version(base_key, applied):
+    if not applied:
+        return base_key
+    chain = json.dumps([base_key] + applied).encode('utf-8')
+    return f"{base_key}-{hashlib.sha256(chain).hexdigest()[:8]}"
+
+
+def current_version(file_path, delta_dir=DELTA_DIR):
+    """The version ``load_dataset`` would produce now, without loading anything."""
+    base_key = file_fingerprint(file_path, SNAPSHOT_SALT)['key']
+    return dataset_version(base_key, [delta_id(path) for path in list_deltas(delta_dir)])
+
+
+def _seat_keys(frame):
+    # One common type per key column: a NaN seat makes an export's seat_num
+    # float, and "12.0" must still match "12"
+    return pd.MultiIndex.from_arrays([
+        frame[column].astype('Float64').astype('Int64') if column == 'seat_num' else frame[column].astype(str)
+        for column in SEAT_KEY], names=SEAT_KEY)
+
+
+def merge_delta(base, delta):
+    """Merge ``delta`` into ``base`` by seat.
+
+    Returns the merged frame, the base rows that were replaced, the delta
+    rows that were kept, and counts of rows added and replaced.
+    """
+    delta = delta.drop_duplicates(SEAT_KEY, keep='last')
+    base_keys = _seat_keys(base)
+    delta_keys = _seat_keys(delta)
+
+    replaced_mask = base_keys.isin(delta_keys)
+    replaced = base[replaced_mask]
+    merged = concat_sales([base[~replaced_mask], delta])
+
+    # Added rows are the delta rows that matched no base row; counting them
+    # directly stays right when the base already holds duplicate seats
+    added = int((~delta_keys.isin(base_keys)).sum())
+    stats = {'rows': len(delta), 'added': added, 'replaced': len(replaced)}
+    return merged, replaced, delta, stats
+
+
+def _merged_snapshot_path(dataset):
+    return snapshot_path(dataset['source'], f"{dataset['base_key']}-merged")
+
+
+def apply_new_deltas(dataset, delta_dir=DELTA_DIR):
+    """Apply any deltas in ``delta_dir`` not yet merged into ``dataset``.
+
+    ``dataset`` is updated in place. Returns one report per applied delta
+    with rows added, rows replaced and seconds taken.
+    """
+    with dataset['lock']:
+        pending = [(path, delta_id(path)) for path in list_deltas(delta_dir)]
+        pending = [(path, ident) for path, ident in pending if ident not in dataset['deltas']]
+        reports = []
+        for path, ident in pending:
+            start = time.perf_counter()
+            merged, replaced, delta, stats = merge_delta(dataset['data'], read_normalized(path))
+            update_cube(dataset['cube'], replaced, delta)
+            dataset['data'] = merged
+            dataset['deltas'].append(ident)
+            reports.append({'delta': os.path.basename(path), **stats,
+                            'seconds': time.perf_counter() - start})
+
+        if reports:
+            dataset['version'] = dataset_version(dataset['base_key'], dataset['deltas'])
+            write_snapshot(dataset['data'], _merged_snapshot_path(dataset),
+                           metadata={'applied_deltas': json.dumps(dataset['deltas'])})
+            dataset['delta_reports'] = reports
+        return reports
+
+
+def with_new_deltas(dataset, delta_dir=DELTA_DIR):
+    """A copy of ``dataset`` with any new deltas applied, or None if there are none.
+
+    ``dataset`` itself is left untouched, so anything still reading it keeps
+    a consistent frame and cube while the copy is built.
+    """
+    if all(delta_id(path) in dataset['deltas'] for path in list_deltas(delta_dir)):
+        return None
+    # update_cube replaces the cube's frames rather than editing them, so
+    # shallow copies are enough to keep the original intact
+    updated = {**dataset, 'cube': dict(dataset['cube']), 'deltas': list(dataset['deltas']),
+               'lock': threading.Lock()}
+    apply_new_deltas(updated, delta_dir)
+    return updated
+
+
+def load_dataset(file_path, delta_dir=DELTA_DIR):
+    """Load the base export plus every delta, reusing the merged snapshot.
+
+    The merged snapshot is only reused when the deltas it already contains
+    are still the leading deltas on disk; otherwise history is rebuilt from
+    the base snapshot.
+    """
+    df, load_report = load_sales(file_path)
+    base_key = load_report['snapshot']['fingerprint']['key']
+    dataset = {
+        'source': file_path,
+        'base_key': base_key,
+        'data': df,
+        'report': load_report,
+        'deltas': [],
+        'delta_reports': [],
+        'lock': threading.Lock(),
+    }
+
+    merged_path = _merged_snapshot_path(dataset)
+    if os.path.exists(merged_path):
+        applied = json.loads(read_snapshot_metadata(merged_path).get('applied_deltas', '[]'))
+        on_disk = [delta_id(path) for path in list_deltas(delta_dir)]
+        if on_disk[:len(applied)] == applied:
+            dataset['data'] = read_snapshot(merged_path)
+            dataset['deltas'] = applied
+
+    dataset['cube'] = build_cube(dataset['data'])
+    dataset['version'] = dataset_version(base_key, dataset['deltas'])
+    apply_new_deltas(dataset, delta_dir)
+    return dataset
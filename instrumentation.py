@@ -0,0 +1,159 @@
+"""Per-rerun timing, row and memory instrumentation for the dashboard's stages.
+
+Each Streamlit rerun starts a recorder with ``start_rerun``; code then wraps
+its stages in ``with stage('name'):`` blocks. A stage records wall time and
+rows processed. Set GROUP_SALES_TRACE_MEMORY=1 to also record the peak
+Python heap (via tracemalloc) allocated while it ran; tracing slows reruns
+down severalfold, so it is off by default. The peak is process-wide, so it
+is only reported for stages that ran while no other session was rerunning.
+Set GROUP_SALES_STAGE_LOG to also append each rerun's stages as a JSON line
+to a rolling log file.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+
+TRACE_MEMORY = os.environ.get('GROUP_SALES_TRACE_MEMORY', '0') == '1'
+
+STAGE_LOG = os.environ.get('GROUP_SALES_STAGE_LOG')
+STAGE_LOG_BYTES = 5 * 1024 * 1024
+STAGE_LOG_BACKUPS = 3
+
+_current = contextvars.ContextVar('stage_recorder', default=None)
+
+# Recorders whose rerun is still running, and how many have ever started;
+# a stage's peak is its own only if no other rerun overlapped it
+_active = weakref.WeakSet()
+_started = 0
+_active_lock = threading.Lock()
+
+_logger = logging.getLogger('groupsalesdash.stages')
+
+
+def _stage_logger():
+    # Attach the rotating handler once per process
+    if STAGE_LOG and not _logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(
+            STAGE_LOG, maxBytes=STAGE_LOG_BYTES, backupCount=STAGE_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(handler)
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+    return _logger
+
+
+class StageRecorder:
+    """Collects stage records for one rerun."""
+
+    def __init__(self, label=None):
+        self.label = label
+        self.records = []
+        self._stack = []
+        self._next_order = 0
+        self._started = time.perf_counter()
+        if TRACE_MEMORY and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None):
+        # The yielded record can be updated in the block, e.g. record['rows'] = n
+        alone_from = _exclusive() if TRACE_MEMORY else None
+        current, peak = tracemalloc.get_traced_memory() if TRACE_MEMORY else (0, 0)
+        if TRACE_MEMORY:
+            if self._stack:
+                parent = self._stack[-1]
+                parent['_peak'] = max(parent['_peak'], peak - parent['_start_memory'])
+            tracemalloc.reset_peak()
+
+        record = {'stage': name, 'order': self._next_order, 'depth': len(self._stack), 'rows': rows,
+                  '_start_memory': current, '_peak': 0}
+        self._next_order += 1
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            self._stack.pop()
+            if TRACE_MEMORY:
+                _, peak = tracemalloc.get_traced_memory()
+                record['_peak'] = max(record['_peak'], peak - record['_start_memory'])
+                if self._stack:
+                    parent = self._stack[-1]
+                    parent['_peak'] = max(parent['_peak'],
+                                          record['_peak'] + record['_start_memory'] - parent['_start_memory'])
+                tracemalloc.reset_peak()
+
+            # Another rerun overlapping this stage would have moved the process-wide peak
+            peak = max(record.pop('_peak'), 0)
+            record['peak_bytes'] = peak if alone_from is not None and _exclusive() == alone_from else None
+            del record['_start_memory']
+            self.records.append(record)
+
+    def total_seconds(self):
+        return time.perf_counter() - self._started
+
+    def table(self):
+        # Records in start order, for display
+        records = sorted(self.records, key=lambda record: record['order'])
+        return [{'stage': '  ' * record['depth'] + record['stage'],
+                 'ms': round(record['seconds'] * 1000, 2),
+                 'rows': record['rows'],
+                 'peak KiB': round(record['peak_bytes'] / 1024, 1) if record['peak_bytes'] is not None else None}
+                for record in records]
+
+    def finish(self):
+        # Done rerunning; other sessions' stages may report their peaks again
+        with _active_lock:
+            _active.discard(self)
+
+    def log(self):
+        self.finish()
+        if not STAGE_LOG:
+            return
+        _stage_logger().info(json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'label': self.label,
+            'total_seconds': self.total_seconds(),
+            'stages': self.records,
+        }, default=str))
+
+
+def _exclusive():
+    # The start count while exactly one rerun is active, else None
+    with _active_lock:
+        return _started if len(_active) == 1 else None
+
+
+def start_rerun(label=None):
+    global _started
+    previous = _current.get()
+    if previous is not None:
+        # The session's last rerun, if it stopped before logging
+        previous.finish()
+    recorder = StageRecorder(label)
+    with _active_lock:
+        _active.add(recorder)
+        _started += 1
+    _current.set(recorder)
+    return recorder
+
+
+@contextlib.contextmanager
+def stage(name, rows=None):
+    """Record ``name`` on the current rerun's recorder; a no-op without one."""
+    recorder = _current.get()
+    if recorder is None:
+        yield {'stage': name, 'rows': rows}
+        return
+    with recorder.stage(name, rows) as record:
+        yield record
+
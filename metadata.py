@@ -0,0 +1,93 @@
+"""Event and rep metadata, loaded from a config file and compiled into lookups.
+
+metadata.json (or the file named by GROUP_SALES_METADATA) lists every
+event in display order, with its export code, display label, date and
+opponent. It also holds the rules for which reps appear on the rep pages.
+A new season is a config edit rather than a code change.
+
+At load time the registry is compiled into indexes. Labelling events,
+ordering them and filtering reps are then vectorized lookups: events are
+labelled per category rather than per row, and ordered by integer sort
+keys.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+METADATA_FILE = os.environ.get('GROUP_SALES_METADATA',
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metadata.json'))
+
+EVENT_FIELDS = ['code', 'label', 'date', 'opponent']
+
+
+def load_registry(path=METADATA_FILE):
+    """Read and compile the metadata file; duplicate event codes or labels are an error."""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+
+    events = pd.DataFrame(raw.get('events', []), columns=EVENT_FIELDS)
+    for field in ('code', 'label'):
+        duplicated = events[field][events[field].duplicated()]
+        if len(duplicated):
+            raise ValueError(f"{path}: duplicate event {field}s {sorted(duplicated)}")
+    events['date'] = pd.to_datetime(events['date'])
+    # Display order is the order the events are listed in
+    events['sort_key'] = np.arange(len(events))
+
+    rules = raw.get('reps', {})
+    return {
+        'path': path,
+        'events': events,
+        'labels': pd.Series(events['label'].to_numpy(), index=pd.Index(events['code'])),
+        'codes': pd.Series(events['code'].to_numpy(), index=pd.Index(events['label'])),
+        'event_index': pd.Index(events['label']),
+        'opponents': pd.Series(events['opponent'].to_numpy(), index=pd.Index(events['label'])),
+        'dates': pd.Series(events['date'].to_numpy(), index=pd.Index(events['label'])),
+        'min_rep_rows': int(rules.get('min_rows', 0)),
+        'excluded_reps': pd.Index(rules.get('exclude', [])),
+    }
+
+
+REGISTRY = load_registry()
+
+
+def label_mapping(registry=REGISTRY):
+    # Plain code -> label dict, e.g. for fingerprinting
+    return registry['labels'].to_dict()
+
+
+def event_labels(codes, registry=REGISTRY):
+    """Display labels for a categorical of event codes; unlisted codes keep their code."""
+    categories = codes.cat.categories
+    labels = registry['labels'].reindex(categories).to_numpy()
+    return codes.cat.rename_categories(np.where(pd.isna(labels), categories, labels))
+
+
+def event_code(label, registry=REGISTRY):
+    return registry['codes'].get(label, label)
+
+
+def event_sort_keys(labels, registry=REGISTRY):
+    """Integer sort key per label: listed events first, then the rest alphabetically."""
+    labels = pd.Index(labels).astype(str)
+    keys = registry['event_index'].get_indexer(labels)
+    unlisted = keys < 0
+    if unlisted.any():
+        others = pd.Index(sorted(set(labels[unlisted])))
+        keys[unlisted] = len(registry['event_index']) + others.get_indexer(labels[unlisted])
+    return keys
+
+
+def event_attribute(labels, field, fallback, registry=REGISTRY):
+    """``opponents`` or ``dates`` for each label, ``fallback`` where it isn't listed."""
+    values = registry[field].reindex(pd.Index(labels).astype(str))
+    return values.where(values.notna(), pd.Series(fallback, index=values.index)).to_numpy()
+
+
+def eligible_rep_mask(reps, rows, registry=REGISTRY):
+    """Which reps may appear on the rep pages, given their ticket row counts."""
+    rows = np.asarray(rows)
+    return (rows >= registry['min_rep_rows']) & ~pd.Index(reps).isin(registry['excluded_reps'])
@@ -0,0 +1,159 @@
+"""Sales pacing: historical cumulative curves and projected finals for upcoming games.
+
+Every game's sales are scattered into one (events x days before the game)
+matrix built from the cube. Games played by the as-of date form the
+history: their mean and percentile cumulative curves, overall or per
+opponent or weekday. Each upcoming game's sales to date are then projected
+to a final figure from its curve's completion at the same days out. All
+games are projected in one vectorized batch, and results are cached on the
+cube, which is rebuilt or updated whenever the data version changes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from metadata import event_attribute
+
+# Ways to group the historical curves an upcoming game is paced against
+PACE_GROUPS = ['All games', 'Opponent', 'Weekday']
+
+PERCENTILES = [10, 50, 90]
+
+# A group needs this many completed games before it gets its own curve
+MIN_GROUP_GAMES = 3
+
+# Below this share of a typical final, scaling sales to date is too noisy;
+# the mean remaining sales are added instead
+MIN_COMPLETION = 0.05
+
+
+def event_days(cube):
+    """Daily sales by days before the game for every event, cached on the cube."""
+    matrix = cube.get('event_days')
+    if matrix is not None:
+        return matrix
+
+    cells = cube['cells']
+    labels = cells['event_name_display'].astype(str)
+    events = pd.Index(sorted(labels.unique()))
+    rows = events.get_indexer(labels)
+    days = cells['days_difference'].to_numpy(np.int64)
+    n_days = int(days.max()) + 1 if len(days) else 1
+
+    sales = np.bincount(rows * n_days + days, weights=cells['block_full_price'].to_numpy(np.float64),
+                        minlength=len(events) * n_days).reshape(len(events), n_days)
+    # Running total from the earliest day out down to game day
+    cumulative = np.cumsum(sales[:, ::-1], axis=1)[:, ::-1]
+
+    # Registry dates where listed; otherwise the latest sale day plus its days out
+    game_days = cells['add_date'].to_numpy().astype('datetime64[D]') + days
+    game_dates = pd.Series(game_days).groupby(rows).max().sort_index()
+    game_dates = event_attribute(events, 'dates', game_dates.to_numpy().astype('datetime64[ns]'))
+
+    matrix = cube['event_days'] = {
+        'events': events,
+        'game_dates': pd.DatetimeIndex(game_dates),
+        'last_sale': cells['add_date'].max(),
+        'cumulative': cumulative,
+        'pacing': {},
+    }
+    return matrix
+
+
+def _group_labels(matrix, by):
+    if by == 'Opponent':
+        # Unlisted event codes stand alone
+        return pd.Index(event_attribute(matrix['events'], 'opponents', matrix['events']))
+    if by == 'Weekday':
+        return matrix['game_dates'].day_name()
+    return pd.Index(['All games'] * len(matrix['events']))
+
+
+def _curve_stats(cumulative):
+    # Mean and percentile cumulative curves, and remaining sales from each day out
+    remaining = cumulative[:, :1] - cumulative
+    return {
+        'games': len(cumulative),
+        'mean': cumulative.mean(axis=0),
+        'percentiles': np.percentile(cumulative, PERCENTILES, axis=0),
+        'completion': cumulative.sum(axis=0) / max(cumulative[:, 0].sum(), 1e-9),
+        'remaining_mean': remaining.mean(axis=0),
+        'remaining_percentiles': np.percentile(remaining, PERCENTILES, axis=0),
+    }
+
+
+def _stacked(curve_stats, key):
+    return np.stack([stats[key] for stats in curve_stats])
+
+
+def pacing(cube, as_of=None, by='All games'):
+    """Historical curves and projections as of ``as_of`` (default: the last sale).
+
+    Returns a dict with ``as_of``, ``history`` (completed games), ``curves``
+    (overall mean and percentile cumulative sales by days before the game)
+    and ``board`` (one row per upcoming game with sales to date, pace
+    against its curve and the projected final with a P10-P90 range).
+    """
+    matrix = event_days(cube)
+    as_of = pd.Timestamp(as_of if as_of is not None else matrix['last_sale']).normalize()
+    cached = matrix['pacing'].get((as_of, by))
+    if cached is not None:
+        return cached
+
+    n_days = matrix['cumulative'].shape[1]
+    days_out = (matrix['game_dates'] - as_of).days.to_numpy()
+    completed = days_out <= 0
+    history = matrix['cumulative'][completed]
+
+    # Curve 0 is every completed game; groups with enough history get their own
+    labels = _group_labels(matrix, by)
+    curve_names = ['All games']
+    curve_stats = [_curve_stats(history)] if len(history) else []
+    event_curve = np.zeros(len(labels), dtype=np.intp)
+    if by != 'All games' and len(history):
+        for label in sorted(set(labels[completed])):
+            members = labels == label
+            if (members & completed).sum() >= MIN_GROUP_GAMES:
+                curve_names.append(f'{by}: {label}')
+                curve_stats.append(_curve_stats(matrix['cumulative'][members & completed]))
+                event_curve[members] = len(curve_names) - 1
+
+    upcoming = np.flatnonzero(~completed)
+    board = pd.DataFrame({'Game': matrix['events'][upcoming], 'Game Date': matrix['game_dates'][upcoming],
+                          'Days Out': days_out[upcoming]})
+    if curve_stats and len(upcoming):
+        # Sales booked by as_of are those at or beyond each game's days out
+        day = np.minimum(days_out[upcoming], n_days - 1)
+        beyond = days_out[upcoming] >= n_days
+        to_date = np.where(beyond, 0, matrix['cumulative'][upcoming, day])
+
+        curve = event_curve[upcoming]
+        typical = _stacked(curve_stats, 'mean')[curve, day]
+        completion = _stacked(curve_stats, 'completion')[curve, day]
+        remaining_mean = _stacked(curve_stats, 'remaining_mean')[curve, day]
+        remaining_low, _, remaining_high = np.moveaxis(_stacked(curve_stats, 'remaining_percentiles'), 1, 0)[:, curve, day]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pace = np.where(typical > 0, to_date / typical, np.nan)
+            projected = np.where(completion >= MIN_COMPLETION, to_date / completion, to_date + remaining_mean)
+        board = board.assign(**{
+            'Sales to Date': to_date,
+            'Typical to Date': typical,
+            'Pace': pace,
+            'Projected Sales': projected.round(2),
+            'Low (P10)': (to_date + remaining_low).round(2),
+            'High (P90)': (to_date + remaining_high).round(2),
+            'Curve': np.array(curve_names, dtype=object)[curve],
+        })
+
+    # Overall curves; all NaN until at least one game has been played
+    overall = curve_stats[0] if curve_stats else {
+        'mean': np.full(n_days, np.nan), 'percentiles': np.full((len(PERCENTILES), n_days), np.nan)}
+    curves = pd.DataFrame({'days_difference': np.arange(n_days), 'Mean': overall['mean']})
+    for percentile, values in zip(PERCENTILES, overall['percentiles']):
+        curves[f'P{percentile}'] = values
+
+    result = matrix['pacing'][(as_of, by)] = {
+        'as_of': as_of, 'history': int(completed.sum()), 'curves': curves,
+        'board': board.sort_values('Game Date', ignore_index=True)}
+    return result
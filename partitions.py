@@ -0,0 +1,180 @@
+"""Multi-season sales store partitioned by season and event.
+
+Exports are imported once into ``partitions/season=YYYY/event_name=CODE/``
+Parquet files, sorted by rep and sale date so row-group statistics can skip
+data. Reads push the season and event filters down to directory pruning and
+the rep and date filters down to row groups, so selecting one game never
+opens another season's files. Importing an export merges it by seat into
+the partitions it covers, so a partial or delta export never drops the
+rows already stored there.
+"""
+
+import argparse
+import functools
+import hashlib
+import operator
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from cube import build_cube
+from incremental import merge_delta
+from ingest import SALES_SCHEMA, apply_schema, build_report, normalize_sales, read_normalized
+
+PARTITION_DIR = os.environ.get('GROUP_SALES_PARTITION_DIR', 'partitions')
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('season', pa.int16()), ('event_name', pa.string())]), flavor='hive')
+
+ROW_GROUP_ROWS = 64 * 1024
+
+
+def game_season(df):
+    # Season is the year the game is played, i.e. sale date + days before game
+    game_date = df['add_datetime'].dt.normalize() + pd.to_timedelta(df['days_difference'], unit='D')
+    return game_date.dt.year.astype('int16')
+
+
+def _existing_rows(df, root):
+    # Rows already stored in the (season, event) partitions ``df`` covers
+    touched = df[['season', 'event_name']].drop_duplicates()
+    existing = read_partitions(root, seasons=touched['season'].unique().tolist(),
+                               events=touched['event_name'].unique().tolist())
+    if existing is None:
+        return None
+    existing = existing.assign(season=game_season(existing), event_name=existing['event_name'].astype(str))
+    keys = pd.MultiIndex.from_frame(existing[['season', 'event_name']])
+    return existing[keys.isin(pd.MultiIndex.from_frame(touched))]
+
+
+def write_partitions(df, root=PARTITION_DIR, replace=False):
+    """Write ``df`` into the store, merged by seat into the partitions it covers.
+
+    A row for a seat already on file replaces it and every other stored row
+    is kept, so partial and delta exports can be imported. With ``replace``
+    the covered partitions are overwritten with ``df`` alone.
+    """
+    df = df[[column for column in SALES_SCHEMA if column in df.columns]]
+    df = df.assign(season=game_season(df), event_name=df['event_name'].astype(str))
+    if not replace:
+        existing = _existing_rows(df, root)
+        if existing is not None and len(existing):
+            existing = existing[[column for column in df.columns if column in existing.columns]]
+            df, _, _, _ = merge_delta(existing, df)
+    df = df.sort_values(['season', 'event_name', 'acct_rep_full_name', 'add_datetime'])
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table, root, format='parquet', partitioning=PARTITIONING,
+        basename_template='part-{i}.parquet', existing_data_behavior='delete_matching',
+        max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, len(df)) or 1)
+
+
+def import_csv(file_path, root=PARTITION_DIR, replace=False):
+    write_partitions(read_normalized(file_path), root, replace)
+
+
+def list_partitions(root=PARTITION_DIR):
+    # Seasons and events present in the store, from directory names only
+    partitions = []
+    if os.path.isdir(root):
+        for season_dir in sorted(os.listdir(root)):
+            if not season_dir.startswith('season='):
+                continue
+            for event_dir in sorted(os.listdir(os.path.join(root, season_dir))):
+                if event_dir.startswith('event_name='):
+                    partitions.append({'season': int(season_dir.split('=', 1)[1]),
+                                       'event_name': event_dir.split('=', 1)[1]})
+    return pd.DataFrame(partitions, columns=['season', 'event_name'])
+
+
+def _partition_dirs(root, seasons=None, events=None):
+    index = list_partitions(root)
+    if seasons is not None:
+        index = index[index['season'].isin(seasons)]
+    if events is not None:
+        index = index[index['event_name'].isin(events)]
+    return [os.path.join(root, f'season={season}', f'event_name={event}')
+            for season, event in zip(index['season'], index['event_name'])]
+
+
+def partitions_version(root=PARTITION_DIR, seasons=None, events=None):
+    """Fingerprint of the files a read with these filters would touch."""
+    digest = hashlib.sha256()
+    for directory in _partition_dirs(root, seasons, events):
+        for name in sorted(os.listdir(directory)):
+            stat = os.stat(os.path.join(directory, name))
+            digest.update(f'{directory}/{name}|{stat.st_size}|{stat.st_mtime_ns}'.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def partition_filter(seasons=None, events=None, reps=None, start=None, end=None):
+    conditions = []
+    if seasons is not None:
+        conditions.append(ds.field('season').isin([int(season) for season in seasons]))
+    if events is not None:
+        conditions.append(ds.field('event_name').isin(list(events)))
+    if reps is not None:
+        conditions.append(ds.field('acct_rep_full_name').isin(list(reps)))
+    if start is not None:
+        conditions.append(ds.field('add_datetime') >= pd.Timestamp(start))
+    if end is not None:
+        # ``end`` is an inclusive sale date
+        conditions.append(ds.field('add_datetime') < pd.Timestamp(end) + pd.Timedelta(days=1))
+    return functools.reduce(operator.and_, conditions) if conditions else None
+
+
+def read_partitions(root=PARTITION_DIR, seasons=None, events=None, reps=None, start=None, end=None):
+    """Read the normalized frame for the given filters.
+
+    Only directories for the requested seasons and events are opened; rep and
+    sale-date filters are evaluated against row-group statistics first.
+    """
+    paths = [os.path.join(directory, name)
+             for directory in _partition_dirs(root, seasons, events)
+             for name in sorted(os.listdir(directory))]
+    if not paths:
+        return None
+
+    dataset = ds.dataset(paths, format='parquet', partitioning=PARTITIONING, partition_base_dir=root)
+    table = dataset.to_table(filter=partition_filter(seasons, events, reps, start, end))
+    df = apply_schema(table.to_pandas(), SALES_SCHEMA)
+    return normalize_sales(df)
+
+
+def load_partitioned_dataset(root=PARTITION_DIR, seasons=None, events=None, reps=None, start=None, end=None):
+    """Partitioned counterpart of ``incremental.load_dataset``."""
+    start_time = time.perf_counter()
+    df = read_partitions(root, seasons, events, reps, start, end)
+    if df is None:
+        return None
+
+    version = partitions_version(root, seasons, events)
+    return {
+        'source': root,
+        'base_key': version,
+        'version': version,
+        'data': df,
+        'report': build_report(df, time.perf_counter() - start_time, 'partitions'),
+        'cube': build_cube(df),
+        'deltas': [],
+        'delta_reports': [],
+        'lock': threading.Lock(),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import ticketing exports into the partitioned store.')
+    parser.add_argument('files', nargs='+', help='export CSV files to import')
+    parser.add_argument('--root', default=PARTITION_DIR, help='partitioned store directory')
+    parser.add_argument('--replace', action='store_true',
+                        help='overwrite the partitions each file covers instead of merging into them')
+    args = parser.parse_args()
+
+    for file_path in args.files:
+        import_csv(file_path, args.root, args.replace)
+    print(list_partitions(args.root).groupby('season').size().rename('events').to_string())
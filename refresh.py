@@ -0,0 +1,179 @@
+"""Background refresh of the shared dataset, swapped in atomically.
+
+A DatasetStore holds the current dataset for one source. A daemon thread
+polls the source every GROUP_SALES_REFRESH_SECONDS and reloads off the
+request path when it changes. The source is the base export, its delta
+exports, or a season's partitions. A change must look the same on two
+consecutive polls before it is read, so a file still being copied in is
+never parsed half-written.
+
+New data is parsed, merged and aggregated into a fresh dataset, and the
+derived arrays pages need are warmed. The new dataset is then published
+with a single reference assignment. A rerun that grabbed the previous
+state keeps a consistent frame and cube until it finishes, and no rerun
+ever waits on a reload.
+
+Each version is published once to the shared store (see shared_store.py),
+and every process serving the same source attaches to the same mapping
+instead of parsing its own copy.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from filters import filter_index
+from incremental import DELTA_DIR, current_version, list_deltas, load_dataset, with_new_deltas
+from pacing import pacing
+from partitions import load_partitioned_dataset, partitions_version
+from seats import seat_index
+from shared_store import attach, publish, shared_dataset
+from timeseries import rep_series
+
+REFRESH_SECONDS = float(os.environ.get('GROUP_SALES_REFRESH_SECONDS', 10))
+
+logger = logging.getLogger(__name__)
+
+
+def _stat_token(path):
+    stat = os.stat(path)
+    return (os.path.basename(path), stat.st_size, stat.st_mtime_ns)
+
+
+def warm_dataset(dataset):
+    # Build the cube's derived arrays before the swap so no page pays for them
+    if dataset is not None:
+        rep_series(dataset['cube'])
+        pacing(dataset['cube'])
+        seat_index(dataset)
+        filter_index(dataset)
+    return dataset
+
+
+class DatasetStore:
+    """The current dataset for one source, refreshed by a background thread.
+
+    ``load()`` builds a dataset from scratch. ``probe()`` returns a token
+    that changes whenever the source does. ``probe_base()``, if given,
+    returns the part of the token that needs a full reload. Any other change
+    goes through ``update(dataset)``, which returns an updated copy, or None
+    when there is nothing new.
+    """
+
+    def __init__(self, name, load, probe, probe_base=None, update=None, interval=REFRESH_SECONDS):
+        self.name = name
+        self._load = load
+        self._probe = probe
+        self._probe_base = probe_base
+        self._update = update
+        self.interval = interval
+        self._state = None
+        self._pending = None
+        self._stop = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self.last_error = None
+
+    def start(self):
+        # The very first load has nothing older to serve, so it runs inline
+        self._publish(self._load, self._probe(), self._probe_base() if self._probe_base else None)
+        self._thread = threading.Thread(target=self._run, name=f'refresh-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def current(self):
+        """The latest published state: dataset, generation, loaded_at and seconds."""
+        return self._state
+
+    def _publish(self, build, token, base_token):
+        start = time.perf_counter()
+        dataset = warm_dataset(build())
+        previous = self._state
+        # One reference assignment: readers see the old state or the new one
+        self._state = {
+            'dataset': dataset,
+            'generation': previous['generation'] + 1 if previous else 1,
+            'loaded_at': time.time(),
+            'seconds': time.perf_counter() - start,
+            'token': token,
+            'base_token': base_token,
+        }
+
+    def refresh_now(self):
+        """Reload if the source changed and has been stable since the last poll.
+
+        Returns True when a new dataset was published.
+        """
+        with self._refresh_lock:
+            token = self._probe()
+            if token == self._state['token']:
+                self._pending = None
+                return False
+            if token != self._pending:
+                # Seen for the first time; wait a poll in case it is still being written
+                self._pending = token
+                return False
+            self._pending = None
+
+            base_token = self._probe_base() if self._probe_base else None
+            current = self._state['dataset']
+            if self._update is not None and current is not None and base_token == self._state['base_token']:
+                updated = self._update(current)
+                if updated is None:
+                    self._state = {**self._state, 'token': token}
+                    return False
+                self._publish(lambda: updated, token, base_token)
+            else:
+                self._publish(self._load, token, base_token)
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh_now()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the last good dataset; retry on the next poll
+                self.last_error = f'{type(e).__name__}: {e}'
+                logger.exception('Refreshing %s failed', self.name)
+
+
+def _shared_update(dataset, delta_dir):
+    # Deltas are merged into a private copy, which then replaces the shared version
+    updated = with_new_deltas(dataset, delta_dir)
+    if updated is None:
+        return None
+    publish(updated, dataset.get('stream'))
+    return attach(updated['version'])
+
+
+def export_store(file_path, delta_dir=DELTA_DIR, interval=REFRESH_SECONDS):
+    """A started store for an export plus its delta directory."""
+    def probe():
+        return (_stat_token(file_path), tuple(_stat_token(path) for path in list_deltas(delta_dir)))
+
+    return DatasetStore(
+        os.path.basename(file_path),
+        load=lambda: shared_dataset(current_version(file_path, delta_dir),
+                                    lambda: load_dataset(file_path, delta_dir)),
+        probe=probe,
+        probe_base=lambda: _stat_token(file_path),
+        update=lambda dataset: _shared_update(dataset, delta_dir),
+        interval=interval,
+    ).start()
+
+
+def partition_store(root, season, interval=REFRESH_SECONDS):
+    """A started store for one season of a partitioned store."""
+    return DatasetStore(
+        f'season-{season}',
+        load=lambda: shared_dataset(partitions_version(root, [season]),
+                                    lambda: load_partitioned_dataset(root, seasons=[season]),
+                                    stream=f'{os.path.abspath(root)}:season-{season}'),
+        probe=lambda: partitions_version(root, [season]),
+        interval=interval,
+    ).start()
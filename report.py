@@ -0,0 +1,167 @@
+"""Headless batch report: every dashboard table and chart, for every game and rep.
+
+Usage:
+    python report.py --out reports
+    python report.py --partitions partitions --season 2024 --format parquet --workers 8
+
+The data is scanned once into the aggregate cube; per-game and per-rep
+outputs are then produced from that cube by a process pool. Workers attach
+to the shared copy of the cube (see shared_store.py) rather than receiving a
+pickled one. Tables are written as CSV or Parquet and charts as Vega-Lite
+JSON specs.
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from aggregations import (eligible_reps, event_names, event_time_series, mean_sales_curve, rep_time_series,
+                          sorted_events, stacked_distribution, summary_tables)
+from charts import (event_cumulative_chart, game_bar_chart, mean_sales_chart, rep_bar_chart, rep_daily_chart,
+                    sales_distribution_chart)
+from incremental import current_version, load_dataset
+from partitions import load_partitioned_dataset, partitions_version
+from shared_store import attach, shared_dataset
+
+# Set in each worker by _init_worker so the cube is loaded once per process
+_cube = None
+_mean_sales_data = None
+
+
+def slugify(name):
+    return re.sub(r'[^A-Za-z0-9]+', '-', str(name)).strip('-').lower()
+
+
+def write_table(frame, path, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == 'parquet':
+        frame.to_parquet(f'{path}.parquet', index=False)
+    else:
+        frame.to_csv(f'{path}.csv', index=False)
+
+
+def write_spec(chart, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f'{path}.vl.json', 'w', encoding='utf-8') as f:
+        f.write(chart.to_json())
+
+
+def _init_worker(cube, mean_sales_data, shared=None):
+    global _cube, _mean_sales_data
+    # A shared dataset is attached by (version, directory) instead of pickled
+    _cube = attach(*shared)['cube'] if shared else cube
+    _mean_sales_data = mean_sales_data
+
+
+def _event_report(event_name, out_dir, fmt):
+    base = os.path.join(out_dir, 'games', slugify(event_name))
+    sales, orders, tickets = event_time_series(_cube, event_name)
+    time_series = sales.merge(orders, on='Days Difference').merge(tickets, on='Days Difference')
+    write_table(time_series, os.path.join(base, 'time_series'), fmt)
+
+    write_spec(event_cumulative_chart(sales, 'Cumulative Sales', event_name) + mean_sales_chart(_mean_sales_data),
+               os.path.join(base, 'cumulative_sales'))
+    write_spec(event_cumulative_chart(orders, 'Cumulative Orders', event_name, color='orange'),
+               os.path.join(base, 'cumulative_orders'))
+    write_spec(event_cumulative_chart(tickets, 'Cumulative Tickets Sold', event_name, color='green'),
+               os.path.join(base, 'cumulative_tickets'))
+    return event_name
+
+
+def _rep_report(sales_rep, out_dir, fmt):
+    base = os.path.join(out_dir, 'reps', slugify(sales_rep))
+    rep_series = rep_time_series(_cube, sales_rep)
+    if rep_series is None:
+        return sales_rep
+    sales, orders, tickets = rep_series
+    time_series = sales.merge(orders, on='Date').merge(tickets, on='Date')
+    write_table(time_series, os.path.join(base, 'time_series'), fmt)
+
+    write_spec(rep_daily_chart(sales, 'Total Sales', sales_rep), os.path.join(base, 'total_sales'))
+    write_spec(rep_daily_chart(orders, 'Total Orders', sales_rep, color='orange'), os.path.join(base, 'total_orders'))
+    write_spec(rep_daily_chart(tickets, 'Total Tickets Sold', sales_rep, color='green'),
+               os.path.join(base, 'total_tickets'))
+    return sales_rep
+
+
+def write_summary(cube, out_dir, fmt):
+    event_order = sorted_events(cube)
+    reps = eligible_reps(cube)
+    tables = summary_tables(cube)
+    for name, table in tables.items():
+        write_table(table, os.path.join(out_dir, name), fmt)
+
+    games = tables['game_totals']
+    write_spec(game_bar_chart(games, 'block_full_price', 'Cumulative Group Sales ($)', event_order),
+               os.path.join(out_dir, 'game_sales'))
+    write_spec(game_bar_chart(games, 'total_orders', 'Cumulative Group Orders', event_order),
+               os.path.join(out_dir, 'game_orders'))
+    write_spec(game_bar_chart(games, 'num_seats', 'Cumulative Group Tickets', event_order),
+               os.path.join(out_dir, 'game_tickets'))
+
+    rep_table = tables['rep_totals']
+    write_spec(rep_bar_chart(rep_table, 'block_full_price', 'Cumulative Sales ($)'), os.path.join(out_dir, 'rep_sales'))
+    write_spec(rep_bar_chart(rep_table, 'total_orders', 'Cumulative Ticket Orders'), os.path.join(out_dir, 'rep_orders'))
+    write_spec(rep_bar_chart(rep_table, 'num_seats', 'Cumulative Tickets Sold'), os.path.join(out_dir, 'rep_tickets'))
+
+    write_spec(sales_distribution_chart(stacked_distribution(tables['sales_distribution']), event_order),
+               os.path.join(out_dir, 'sales_distribution'))
+    return reps
+
+
+def generate_report(dataset, out_dir, fmt='csv', workers=None):
+    """Write every table and chart for ``dataset`` under ``out_dir``."""
+    start = time.perf_counter()
+    cube = dataset['cube']
+    mean_sales_data = mean_sales_curve(cube)
+
+    reps = write_summary(cube, out_dir, fmt)
+    events = event_names(cube)
+
+    if 'shared' in dataset:
+        initargs = (None, mean_sales_data, (dataset['version'], os.path.dirname(dataset['shared']['dir'])))
+    else:
+        initargs = (cube, mean_sales_data)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        futures = [pool.submit(_event_report, event_name, out_dir, fmt) for event_name in events]
+        futures += [pool.submit(_rep_report, sales_rep, out_dir, fmt) for sales_rep in reps]
+        for future in futures:
+            future.result()
+
+    manifest = {
+        'data_version': dataset['version'],
+        'events': len(events),
+        'reps': len(reps),
+        'format': fmt,
+        'seconds': time.perf_counter() - start,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate the dashboard tables and charts without the UI.')
+    parser.add_argument('--data', default='group_sales1.csv', help='ticketing export CSV (default: %(default)s)')
+    parser.add_argument('--partitions', help='read from this partitioned store instead of --data')
+    parser.add_argument('--season', type=int, action='append', help='season(s) to include from --partitions')
+    parser.add_argument('--out', default='reports', help='output directory (default: %(default)s)')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help='table format')
+    parser.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.partitions:
+        dataset = shared_dataset(partitions_version(args.partitions, args.season),
+                                 lambda: load_partitioned_dataset(args.partitions, seasons=args.season),
+                                 stream=f'{os.path.abspath(args.partitions)}:seasons-{args.season}')
+    else:
+        dataset = shared_dataset(current_version(args.data), lambda: load_dataset(args.data))
+    if dataset is None:
+        parser.error('no data matched the requested source')
+
+    manifest = generate_report(dataset, args.out, args.format, args.workers)
+    print(f"Wrote {manifest['events']} games and {manifest['reps']} reps to {args.out} "
+          f"in {manifest['seconds']:.2f}s")
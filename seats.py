@@ -0,0 +1,190 @@
+"""Seat-level inventory: an interval index over the seat blocks sold.
+
+Each ticket row is a block of seats seat_num..last_seat in one section and
+row. The index is built once per data version and cached on the cube,
+which is rebuilt or updated whenever the data version changes. It sorts
+the blocks by (event, section, row, first seat) and keeps each
+(event, section, row) group's offsets, plus a running maximum of block
+ends within each group. Blocks missing their section, row or seat numbers
+are left out and counted. Totals per row, section or game are then segment
+sums over those offsets. "Which blocks touch seats a..b" is answered with
+binary searches, and no block is ever expanded into individual seats.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _natural_order(values):
+    # Numeric section and row names in numeric order, then the rest; rows
+    # like A..Z, AA..ZZ sort by length first
+    values = pd.Index(values).astype(str)
+    return pd.Index(sorted(values, key=lambda value: (not value.isdigit(), len(value),
+                                                      int(value) if value.isdigit() else value)))
+
+
+def _encode(column, order):
+    # Codes into ``order`` of the values in use, looked up per category rather
+    # than per row; missing values get -1
+    values = column.astype('category')
+    codes = values.cat.codes.to_numpy()
+    used = np.unique(codes)
+    labels = values.cat.categories[used[used >= 0]].astype(str)
+    ordered = pd.Index(order(labels))
+    lookup = ordered.get_indexer(values.cat.categories.astype(str))
+    return ordered, np.where(codes >= 0, lookup[np.maximum(codes, 0)], -1)
+
+
+def _last_seats(data):
+    # Stores imported before last_seat was read fall back to the block length
+    if 'last_seat' in data.columns:
+        return data['last_seat'].to_numpy(np.float64)
+    return data['seat_num'].to_numpy(np.float64) + data['num_seats'].to_numpy(np.float64) - 1
+
+
+def seat_index(dataset):
+    """The interval index over ``dataset``'s seat blocks, cached on its cube."""
+    cube = dataset['cube']
+    index = cube.get('seat_index')
+    if index is not None:
+        return index
+
+    data = dataset['data']
+    events, event_codes = _encode(data['event_name_display'], sorted)
+    sections, section_codes = _encode(data['section_name'], _natural_order)
+    rows, row_codes = _encode(data['row_name'], _natural_order)
+    starts = data['seat_num'].to_numpy(np.float64)
+    ends = _last_seats(data)
+
+    # Blocks missing their game, section, row or seats can't be placed; they
+    # are left out of the index and counted
+    placed = np.flatnonzero((event_codes >= 0) & (section_codes >= 0) & (row_codes >= 0)
+                            & ~np.isnan(starts) & ~np.isnan(ends))
+    event_codes, section_codes, row_codes = event_codes[placed], section_codes[placed], row_codes[placed]
+    starts, ends = starts[placed].astype(np.int64), ends[placed].astype(np.int64)
+
+    # One composite key per (event, section, row); blocks sorted by it, then by first seat
+    groups = (event_codes * len(sections) + section_codes) * len(rows) + row_codes
+    order = np.lexsort((starts, groups))
+    groups = groups[order]
+    group_keys, offsets = np.unique(groups, return_index=True)
+
+    ends = ends[order]
+    # Running maximum of block ends, restarted per group by lifting each
+    # group above the last, so a seat range query is two binary searches
+    group_of_block = np.repeat(np.arange(len(group_keys)), np.diff(np.r_[offsets, len(groups)]))
+    lift = group_of_block * (int(ends.max()) + 1 if len(ends) else 1)
+    max_ends = np.maximum.accumulate(ends + lift) - lift
+
+    index = cube['seat_index'] = {
+        'events': events,
+        'sections': sections,
+        'rows': rows,
+        'group_keys': group_keys,
+        'offsets': offsets,
+        'group_event': group_keys // (len(sections) * len(rows)),
+        'group_section': group_keys // len(rows) % len(sections),
+        'group_row': group_keys % len(rows),
+        'starts': starts[order],
+        'ends': ends,
+        'max_ends': max_ends,
+        'seats': ends - starts[order] + 1,
+        'days_out': data['days_difference'].to_numpy(np.int64)[placed][order],
+        'sales': data['block_full_price'].to_numpy(np.float64)[placed][order],
+        'positions': placed[order],
+        'unplaced': len(data) - len(placed),
+    }
+    # Seats per (section, row): the widest extent sold in it across all games
+    capacity = np.zeros(len(sections) * len(rows), dtype=np.int64)
+    np.maximum.at(capacity, index['group_section'] * len(rows) + index['group_row'],
+                  np.maximum.reduceat(ends, offsets) if len(ends) else np.zeros(0, dtype=np.int64))
+    index['capacity'] = capacity.reshape(len(sections), len(rows))
+    return index
+
+
+def _group_totals(index, min_days_out, first=0, last=None):
+    # Seats, sales and seat-days out for groups first..last-1 (default: all),
+    # counting only blocks bought at least ``min_days_out`` days before the game
+    last = len(index['group_keys']) if last is None else last
+    if first >= last:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    bounds = np.r_[index['offsets'], len(index['starts'])]
+    blocks = slice(bounds[first], bounds[last])
+    starts = index['offsets'][first:last] - bounds[first]
+    booked = index['days_out'][blocks] >= min_days_out
+    seats = np.where(booked, index['seats'][blocks], 0)
+    return (np.add.reduceat(seats, starts),
+            np.add.reduceat(np.where(booked, index['sales'][blocks], 0.0), starts),
+            np.add.reduceat(seats * index['days_out'][blocks], starts).astype(np.float64))
+
+
+def blocks_overlapping(index, event, section, row, first_seat, last_seat):
+    """Positions (in the loaded frame) of the blocks holding any of seats first_seat..last_seat."""
+    try:
+        key = (index['events'].get_loc(event) * len(index['sections'])
+               + index['sections'].get_loc(str(section))) * len(index['rows']) + index['rows'].get_loc(str(row))
+    except KeyError:
+        return np.zeros(0, dtype=np.intp)
+    group = np.searchsorted(index['group_keys'], key)
+    if group == len(index['group_keys']) or index['group_keys'][group] != key:
+        return np.zeros(0, dtype=np.intp)
+    lo = index['offsets'][group]
+    hi = index['offsets'][group + 1] if group + 1 < len(index['offsets']) else len(index['starts'])
+    # Blocks starting at or before last_seat, from the first whose running end reaches first_seat
+    stop = lo + np.searchsorted(index['starts'][lo:hi], last_seat, side='right')
+    start = lo + np.searchsorted(index['max_ends'][lo:stop], first_seat, side='left')
+    candidates = np.arange(start, stop)
+    candidates = candidates[index['ends'][candidates] >= first_seat]
+    return index['positions'][candidates]
+
+
+def section_rows(index, event, min_days_out=0):
+    """Group seats and sales by section and row for one game.
+
+    Density is the share of the row's seats sold to groups; Avg Days Out is
+    how far ahead of the game, on average, those seats were bought.
+    """
+    # Groups are sorted by event first, so one game's groups are a contiguous run
+    event_code = index['events'].get_indexer([event])[0]
+    first, last = (np.searchsorted(index['group_event'], [event_code, event_code + 1]) if event_code >= 0
+                   else (0, 0))
+    seats, sales, seat_days = _group_totals(index, min_days_out, first, last)
+    mine = slice(first, last)
+    section, row = index['group_section'][mine], index['group_row'][mine]
+    capacity = index['capacity'][section, row]
+    frame = pd.DataFrame({
+        'Section': index['sections'][section],
+        'Row': index['rows'][row],
+        'Seats Sold': seats,
+        'Sales': sales,
+        'Row Seats': capacity,
+        'Density': seats / np.maximum(capacity, 1),
+        'Avg Days Out': seat_days / np.maximum(seats, 1),
+    })
+    return frame[frame['Seats Sold'] > 0].reset_index(drop=True)
+
+
+def section_heatmap(index, min_days_out=0):
+    """Group seats per (game, section) across every game, with each section's share sold.
+
+    A section's seats are its rows' seats, counting only rows that have
+    ever sold a group block.
+    """
+    seats, sales, seat_days = _group_totals(index, min_days_out)
+    n_sections = len(index['sections'])
+    cell = index['group_event'] * n_sections + index['group_section']
+    n_cells = len(index['events']) * n_sections
+    seat_totals = np.bincount(cell, weights=seats, minlength=n_cells).reshape(len(index['events']), n_sections)
+    sales_totals = np.bincount(cell, weights=sales, minlength=n_cells).reshape(len(index['events']), n_sections)
+    day_totals = np.bincount(cell, weights=seat_days, minlength=n_cells).reshape(len(index['events']), n_sections)
+    section_seats = index['capacity'].sum(axis=1)
+
+    event, section = np.nonzero(seat_totals)
+    return pd.DataFrame({
+        'Game': index['events'][event],
+        'Section': index['sections'][section],
+        'Seats Sold': seat_totals[event, section].astype(np.int64),
+        'Sales': sales_totals[event, section],
+        'Density': seat_totals[event, section] / np.maximum(section_seats[section], 1),
+        'Avg Days Out': day_totals[event, section] / seat_totals[event, section],
+    })
@@ -0,0 +1,224 @@
+"""Read-only, memory-mapped copies of the dataset shared by every process.
+
+Each data version is published once as uncompressed Arrow IPC files: the
+sales frame plus the cube's cells and accounts tables. They live under
+GROUP_SALES_SHARED_DIR, by default a tmpfs directory in /dev/shm when
+there is one. Every session and server process, and the batch report's
+workers, attach to the same files. Their pandas columns are zero-copy
+views of the mapped pages, so the memory is paid once per machine rather
+than once per process.
+
+Those views are read-only, so an in-place write raises instead of leaking
+into other sessions. The frames are SharedFrames, which also refuse
+column assignment, relabelling and inplace=True methods; derived frames
+(filters, groupbys, copies) are ordinary private DataFrames.
+"""
+
+import json
+import os
+import shutil
+import threading
+import types
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from snapshot_cache import CACHE_DIR
+
+SHARED_DIR = os.environ.get('GROUP_SALES_SHARED_DIR') or (
+    '/dev/shm/group-sales' if os.path.isdir('/dev/shm') else os.path.join(CACHE_DIR, 'shared'))
+
+MANIFEST = 'manifest.json'
+
+
+class SharedFrame(pd.DataFrame):
+    """A DataFrame over shared, read-only buffers; adding or replacing columns raises."""
+
+    @property
+    def _constructor(self):
+        # Anything derived from a shared frame is an ordinary, private frame
+        return pd.DataFrame
+
+    def _refuse(self, *args, **kwargs):
+        raise TypeError('Shared frames are read-only; take a .copy() to modify one')
+
+    # _update_inplace is where every inplace=True method (drop, fillna, ...) lands; rename
+    # and set_index relabel in place first, through the index and columns setters' _set_axis
+    __setitem__ = __delitem__ = insert = pop = _update_inplace = _set_axis = _refuse
+
+
+def _tables(dataset):
+    return {'data': dataset['data'], 'cells': dataset['cube']['cells'], 'accounts': dataset['cube']['accounts']}
+
+
+def _write_table(frame, path):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path):
+    # The whole file as one buffer over the mapping; columns are views into it
+    buffer = pa.memory_map(path, 'r').read_buffer()
+    table = pa.ipc.open_file(buffer).read_all()
+    frame = SharedFrame(table.to_pandas(split_blocks=True))
+    # Columns Arrow had to convert (floats with nulls, ...) are private copies; lock them as well,
+    # since inplace=True methods write into the blocks before SharedFrame._update_inplace runs
+    for block in frame._mgr.blocks:
+        values = getattr(block.values, '_ndarray', block.values)
+        if isinstance(values, np.ndarray):
+            values.flags.writeable = False
+    return frame, (buffer.address, buffer.size)
+
+
+def version_dir(version, shared_dir=SHARED_DIR):
+    return os.path.join(shared_dir, version)
+
+
+def is_published(version, shared_dir=SHARED_DIR):
+    return os.path.exists(os.path.join(version_dir(version, shared_dir), MANIFEST))
+
+
+def remove_stale_versions(stream, keep_version, shared_dir=SHARED_DIR):
+    # Processes still attached to an old version keep their mappings after the unlink
+    if not os.path.isdir(shared_dir):
+        return
+    for name in os.listdir(shared_dir):
+        manifest_path = os.path.join(shared_dir, name, MANIFEST)
+        if name == keep_version or not os.path.exists(manifest_path):
+            continue
+        with open(manifest_path, encoding='utf-8') as f:
+            if json.load(f).get('stream') == stream:
+                shutil.rmtree(os.path.join(shared_dir, name), ignore_errors=True)
+
+
+def publish(dataset, stream=None, shared_dir=SHARED_DIR):
+    """Write ``dataset`` under its version unless another process already has.
+
+    Older versions published for the same ``stream`` (default: the
+    dataset's source, as an absolute path so checkouts in different
+    directories don't remove each other's versions) are removed once this
+    one is in place.
+    """
+    stream = stream or os.path.abspath(dataset['source'])
+    target = version_dir(dataset['version'], shared_dir)
+    if is_published(dataset['version'], shared_dir):
+        return target
+
+    # Build the version in a private directory and rename it into place, so
+    # readers see either nothing or the complete set of files
+    tmp_dir = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    os.makedirs(tmp_dir)
+    for name, frame in _tables(dataset).items():
+        _write_table(frame, os.path.join(tmp_dir, f'{name}.arrow'))
+
+    report = {**dataset['report'], 'columns': dataset['report']['columns'].to_dict('records')}
+    manifest = {key: dataset[key] for key in ('source', 'base_key', 'version', 'deltas', 'delta_reports')}
+    with open(os.path.join(tmp_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump({**manifest, 'stream': stream, 'report': report}, f, default=str)
+
+    try:
+        os.rename(tmp_dir, target)
+    except OSError:
+        # Another process published the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    else:
+        remove_stale_versions(stream, dataset['version'], shared_dir)
+    return target
+
+
+def attach(version, shared_dir=SHARED_DIR):
+    """Map a published version; the result shares its column buffers with every other attachment.
+
+    The mapping itself is read-only, but its ``'cube'`` dict is ordinary and
+    is shared by every session of the process that holds this attachment:
+    the cube functions cache their derived indexes (slices, seat and filter
+    indexes, ...) in it. Those are built from the read-only tables and are
+    the same for every session, so only add entries that are; per-session
+    state belongs outside the dataset.
+    """
+    directory = version_dir(version, shared_dir)
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    frames, regions = {}, []
+    for name in ('data', 'cells', 'accounts'):
+        frames[name], region = _read_table(os.path.join(directory, f'{name}.arrow'))
+        regions.append(region)
+
+    report = {**manifest['report'], 'columns': pd.DataFrame(manifest['report']['columns'])}
+    return types.MappingProxyType({
+        **manifest,
+        'report': report,
+        'data': frames['data'],
+        'cube': {'cells': frames['cells'], 'accounts': frames['accounts']},
+        'lock': threading.Lock(),
+        'shared': {'dir': directory, 'regions': regions},
+    })
+
+
+def shared_dataset(version, build, stream=None, shared_dir=SHARED_DIR):
+    """Attach to ``version`` if it is published, else ``build()``, publish and attach.
+
+    ``version`` is what the source is expected to build to; if the source
+    changed in between, the version actually built is attached instead.
+    """
+    if version is not None and is_published(version, shared_dir):
+        try:
+            return attach(version, shared_dir)
+        except FileNotFoundError:
+            # Replaced by a newer version between the check and the attach
+            pass
+    dataset = build()
+    if dataset is None:
+        return None
+    publish(dataset, stream, shared_dir)
+    return attach(dataset['version'], shared_dir)
+
+
+def _arrays(series):
+    # (numpy array, bytes) pairs backing a column; categories are always private
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        return [(codes, codes.nbytes), (None, int(series.cat.categories.memory_usage(deep=True)))]
+    values = series.to_numpy()
+    return [(values, int(series.memory_usage(deep=True, index=False)))]
+
+
+def _process_memory():
+    # Resident memory split by kind, from /proc on Linux
+    fields = {'RssAnon': 'private (anonymous)', 'RssFile': 'file-backed', 'RssShmem': 'shared memory'}
+    try:
+        with open('/proc/self/status', encoding='utf-8') as f:
+            lines = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return {}
+    return {label: int(lines[field].split()[0]) * 1024 for field, label in fields.items() if field in lines}
+
+
+def memory_report(dataset):
+    """Bytes of each table column held in the shared mapping versus privately.
+
+    Returns a per-table frame and the process's resident memory by kind.
+    """
+    regions = dataset['shared']['regions'] if 'shared' in dataset else []
+
+    def in_shared(array):
+        if array is None or not regions:
+            return False
+        address = array.__array_interface__['data'][0]
+        return any(start <= address < start + size for start, size in regions)
+
+    rows = []
+    for name, frame in _tables(dataset).items():
+        shared = private = 0
+        for column in frame.columns:
+            for array, size in _arrays(frame[column]):
+                if in_shared(array):
+                    shared += size
+                else:
+                    private += size
+        rows.append({'table': name, 'rows': len(frame), 'shared bytes': shared, 'private bytes': private})
+    return pd.DataFrame(rows), _process_memory()
@@ -0,0 +1,136 @@
+"""Disk-backed Parquet snapshots of the normalized sales frame.
+
+A snapshot is keyed on the source file's path, size, mtime and content
+hash, so a replaced export is never served stale. The content is only
+re-hashed when the size or mtime changes. Snapshot names carry a hash of
+the source's absolute path, so same-named exports in different directories
+keep separate snapshots. Later loads memory-map the Parquet file instead of
+re-parsing the CSV text.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CACHE_DIR = os.environ.get('GROUP_SALES_CACHE_DIR', '.snapshot_cache')
+
+HASH_CHUNK_BYTES = 1 << 20
+
+# Sources whose content hashes are remembered; delta files keep arriving, so least recently used go first
+CONTENT_HASH_ENTRIES = 256
+
+# Content hash per absolute path, with the (size, mtime_ns) it was taken at. The
+# refresh threads and the script threads both fingerprint sources.
+_content_hashes = OrderedDict()
+_content_hashes_lock = threading.Lock()
+
+
+def _content_hash(path, stat):
+    with _content_hashes_lock:
+        cached = _content_hashes.get(path)
+        if cached is not None and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            _content_hashes.move_to_end(path)
+            return cached[1]
+    # Hash outside the lock so a large file doesn't hold up other sources
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    with _content_hashes_lock:
+        _content_hashes[path] = ((stat.st_size, stat.st_mtime_ns), digest.hexdigest())
+        _content_hashes.move_to_end(path)
+        while len(_content_hashes) > CONTENT_HASH_ENTRIES:
+            _content_hashes.popitem(last=False)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path, salt=''):
+    path = os.path.abspath(file_path)
+    stat = os.stat(path)
+    fingerprint = {
+        'path': path,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': _content_hash(path, stat),
+    }
+    key_source = '|'.join([salt] + [str(fingerprint[field]) for field in ('path', 'size', 'mtime_ns', 'sha256')])
+    fingerprint['key'] = hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:16]
+    return fingerprint
+
+
+def _snapshot_prefix(file_path):
+    # File stem plus a hash of the absolute path, shared by all of a source's snapshots
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    path_hash = hashlib.sha256(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:8]
+    return f'{stem}-{path_hash}-'
+
+
+def snapshot_path(file_path, key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, f'{_snapshot_prefix(file_path)}{key}.parquet')
+
+
+def read_snapshot(path):
+    table = pq.read_table(path, memory_map=True)
+    return table.to_pandas()
+
+
+def read_snapshot_metadata(path):
+    # User metadata stored alongside the frame, decoded to str -> str
+    metadata = pq.read_schema(path).metadata or {}
+    return {key.decode('utf-8'): value.decode('utf-8') for key, value in metadata.items()
+            if not key.startswith(b'pandas')}
+
+
+def write_snapshot(df, path, metadata=None):
+    # Write to a temporary name and rename so readers never see a partial file
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if metadata:
+        table = table.replace_schema_metadata({**table.schema.metadata, **metadata})
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def remove_stale_snapshots(file_path, keep_key, cache_dir=CACHE_DIR):
+    # Drop snapshots of older versions of the same source, including any
+    # derived from them (their names extend the key)
+    prefix = _snapshot_prefix(file_path)
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and not name.startswith(f'{prefix}{keep_key}'):
+            os.remove(os.path.join(cache_dir, name))
+
+
+def load_snapshot(file_path, build, cache_dir=CACHE_DIR, salt=''):
+    """Return the frame for ``file_path``, building and storing it on a miss.
+
+    ``build`` takes the source path and returns the normalized frame. ``salt``
+    is folded into the key so a change in how the frame is built invalidates
+    old snapshots. The second return value says whether the snapshot was hit
+    and where it lives.
+    """
+    start = time.perf_counter()
+    fingerprint = file_fingerprint(file_path, salt)
+    path = snapshot_path(file_path, fingerprint['key'], cache_dir)
+
+    hit = os.path.exists(path)
+    if hit:
+        df = read_snapshot(path)
+    else:
+        df = build(file_path)
+        write_snapshot(df, path)
+        remove_stale_snapshots(file_path, fingerprint['key'], cache_dir)
+
+    return df, {
+        'hit': hit,
+        'seconds': time.perf_counter() - start,
+        'snapshot_path': path,
+        'fingerprint': fingerprint,
+    }
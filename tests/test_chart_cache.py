@@ -0,0 +1,27 @@
+import numpy as np
+
+from chart_cache import ChartCache
+
+
+def test_remeasure_counts_growth_and_evicts():
+    cache = ChartCache(max_bytes=10_000)
+    view = cache.get_or_build(('v1+abc', 'filters', 'abc'), lambda: {'cube': {}})
+    cache.get_or_build(('v1', 'page'), lambda: np.zeros(100, dtype=np.uint8))
+    before = cache.stats()['bytes']
+
+    # A derived index attached after insertion
+    view['cube']['seat_index'] = {'starts': np.zeros(1000, dtype=np.int64)}
+    cache.remeasure(('v1+abc', 'filters', 'abc'))
+    assert cache.stats()['bytes'] >= before + 8000
+
+    view['cube']['filter_index'] = {'bitmaps': np.zeros(1000, dtype=np.uint64)}
+    cache.remeasure(('v1+abc', 'filters', 'abc'))
+    # Over budget: the oversized view is dropped and the accounting stays within it
+    assert cache.stats()['bytes'] <= 10_000
+    assert cache.get_or_build(('v1', 'page'), lambda: None) is not None
+
+
+def test_remeasure_ignores_evicted_keys():
+    cache = ChartCache(max_bytes=10_000)
+    cache.remeasure(('missing',))
+    assert cache.stats()['entries'] == 0
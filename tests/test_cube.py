@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import build_cube, rollup
+from ingest import read_normalized
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return read_normalized('group_sales1.csv')
+
+
+def reference(sales, by):
+    # The raw-row groupby the cube replaces
+    grouped = sales.groupby(by, observed=True)
+    return pd.DataFrame({
+        'block_full_price': grouped['block_full_price'].sum(),
+        'num_seats': grouped['num_seats'].sum(),
+        'rows': grouped.size(),
+        'orders': grouped['acct_id'].nunique(),
+    }).reset_index()
+
+
+def check(result, expected, by):
+    result = result.sort_values(by).reset_index(drop=True)
+    expected = expected.sort_values(by).reset_index(drop=True)
+    for column in by:
+        assert result[column].astype(str).tolist() == expected[column].astype(str).tolist()
+    for column in ['block_full_price', 'num_seats', 'rows', 'orders']:
+        np.testing.assert_array_equal(result[column].to_numpy(np.int64), expected[column].to_numpy(np.int64))
+
+
+def test_cells_sum_to_the_rows(sales):
+    cube = build_cube(sales)
+    assert cube['cells']['rows'].sum() == len(sales)
+    assert cube['cells']['block_full_price'].sum() == sales['block_full_price'].sum()
+    assert cube['accounts']['rows'].sum() == len(sales)
+
+
+@pytest.mark.parametrize('by', [['event_name_display'], ['acct_rep_full_name'], ['days_difference'],
+                                ['event_name_display', 'acct_rep_full_name'], ['add_date']])
+def test_rollup_matches_groupby(sales, by):
+    frame = sales.assign(add_date=sales['add_datetime'].dt.normalize())
+    check(rollup(build_cube(sales), by), reference(frame, by), by)
+
+
+def test_rollup_where(sales):
+    cube = build_cube(sales)
+    event = sales['event_name_display'].value_counts().index[0]
+    reps = sales['acct_rep_full_name'].value_counts().index[:3].tolist()
+
+    one = rollup(cube, ['days_difference'], where={'event_name_display': event})
+    check(one, reference(sales[sales['event_name_display'] == event], ['days_difference']), ['days_difference'])
+
+    both = rollup(cube, ['event_name_display'], where={'event_name_display': event, 'acct_rep_full_name': reps})
+    chosen = sales[(sales['event_name_display'] == event) & sales['acct_rep_full_name'].isin(reps)]
+    check(both, reference(chosen, ['event_name_display']), ['event_name_display'])
+
+    # The cached slices serve a second, different selection correctly
+    other = sales['event_name_display'].value_counts().index[1]
+    check(rollup(cube, ['acct_rep_full_name'], where={'event_name_display': other}),
+          reference(sales[sales['event_name_display'] == other], ['acct_rep_full_name']), ['acct_rep_full_name'])
+
+
+def test_rollup_of_nothing(sales):
+    empty = rollup(build_cube(sales), ['acct_rep_full_name'], where={'event_name_display': 'No such game'})
+    assert empty.empty
@@ -0,0 +1,29 @@
+import datetime
+
+from streamlit.testing.v1 import AppTest
+
+
+def run_page(page):
+    app = AppTest.from_file('../groupsalesdash.py', default_timeout=120)
+    app.run()
+    [box for box in app.sidebar.selectbox if box.label == 'Select Page'][0].set_value(page).run()
+    return app
+
+
+def test_seat_map_with_only_game_day_sales():
+    # Every sale on the game day itself leaves days out at 0, too narrow for the slider
+    app = run_page('Seat Map')
+    game_day = datetime.date(2024, 6, 8)
+    [date for date in app.sidebar.date_input if date.label == 'Sale dates'][0].set_value((game_day, game_day)).run()
+    assert not app.exception
+    assert not [slider for slider in app.sidebar.slider if slider.label.startswith('Booked at least')]
+
+
+def test_rep_list_ignores_filters():
+    # A filter narrows the reps' numbers, not which reps qualify for the list
+    app = run_page('Sales Rep Performance')
+    reps = [box for box in app.sidebar.selectbox if box.label == 'Select Sales Representative'][0].options
+    price_codes = [box for box in app.sidebar.multiselect if box.label == 'Price Code'][0]
+    price_codes.set_value(price_codes.options[:1]).run()
+    assert not app.exception
+    assert [box for box in app.sidebar.selectbox if box.label == 'Select Sales Representative'][0].options == reps
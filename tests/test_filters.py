@@ -0,0 +1,65 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import CUBE_KEYS, build_cube
+from filters import filter_index, filter_key, filtered_dataset, selected_rows
+from ingest import read_normalized
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    data = read_normalized('group_sales1.csv')
+    return {'data': data, 'cube': build_cube(data), 'version': 'v1', 'source': 'group_sales1.csv'}
+
+
+def selections_for(data):
+    # Two values of one column, one of another, and a column left open
+    price_codes = data['price_code'].value_counts().index[:2].tolist()
+    account_type = data['acct_type_desc'].value_counts().index[0]
+    return [
+        {'price_code': price_codes},
+        {'price_code': price_codes, 'acct_type_desc': [account_type], 'paid': []},
+        {'paid': ['No such value']},
+    ]
+
+
+def reference_mask(data, selections, start=None, end=None):
+    mask = pd.Series(True, index=data.index)
+    for column, values in selections.items():
+        if values:
+            mask &= data[column].astype(str).isin([str(value) for value in values])
+    days = data['add_datetime'].dt.date
+    if start is not None:
+        mask &= days >= start
+    if end is not None:
+        mask &= days <= end
+    return mask.to_numpy()
+
+
+@pytest.mark.parametrize('dates', [(None, None), (datetime.date(2024, 5, 1), None),
+                                   (None, datetime.date(2024, 5, 1)), (datetime.date(2024, 4, 1), datetime.date(2024, 5, 15))])
+def test_selected_rows_match_a_mask(dataset, dates):
+    index = filter_index(dataset)
+    for selections in selections_for(dataset['data']) + [{}]:
+        expected = np.flatnonzero(reference_mask(dataset['data'], selections, *dates))
+        np.testing.assert_array_equal(selected_rows(index, selections, *dates), expected)
+
+
+def test_filtered_cube_matches_a_rebuild(dataset):
+    for selections in selections_for(dataset['data']):
+        view = filtered_dataset(dataset, selections, end=datetime.date(2024, 5, 15))
+        expected = dataset['data'][reference_mask(dataset['data'], selections, end=datetime.date(2024, 5, 15))]
+        assert len(view['data']) == len(expected)
+        rebuilt = build_cube(expected)
+        for table, keys in (('cells', CUBE_KEYS), ('accounts', CUBE_KEYS + ['acct_id'])):
+            left = view['cube'][table].sort_values(keys).reset_index(drop=True)
+            right = rebuilt[table].sort_values(keys).reset_index(drop=True)
+            pd.testing.assert_frame_equal(left.astype(str), right.astype(str))
+        assert view['version'] == f"v1+{filter_key(selections, None, datetime.date(2024, 5, 15))}"
+
+
+def test_no_filter_returns_the_dataset(dataset):
+    assert filtered_dataset(dataset, {'paid': []}) is dataset
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import build_cube, rollup
+from hyperloglog import MAX_PRECISION, group_estimates, precision_for_error, standard_error
+from ingest import read_normalized
+
+
+def test_estimates_within_error_bound():
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 20, 200_000)
+    values = rng.integers(0, 50_000, len(groups))
+    exact = pd.Series(values).groupby(groups).nunique().to_numpy()
+    for error in (0.1, 0.05, 0.02):
+        estimates = group_estimates(groups, values, 20, precision_for_error(error))
+        relative = np.abs(estimates - exact) / exact
+        # Four standard errors is far outside normal variation
+        assert relative.max() < 4 * standard_error(precision_for_error(error))
+
+
+def test_empty_and_small_groups():
+    estimates = group_estimates(np.array([1, 1, 1, 3]), np.array([7, 7, 8, 9]), 5, 12)
+    assert estimates.round().tolist() == [0, 2, 0, 1, 0]
+
+
+def test_precision_is_capped():
+    assert precision_for_error(0.001) == MAX_PRECISION
+
+
+@pytest.mark.parametrize('by', [['event_name_display'], ['acct_rep_full_name'], ['days_difference']])
+def test_rollup_estimates_track_exact_orders(by):
+    cube = build_cube(read_normalized('group_sales1.csv'))
+    exact = rollup(cube, by)
+    approximate = rollup(cube, by, approx_error=0.02)
+    pd.testing.assert_frame_equal(exact.drop(columns='orders'), approximate.drop(columns='orders'))
+    relative = (approximate['orders'] - exact['orders']).abs() / exact['orders']
+    assert relative.max() < 0.1
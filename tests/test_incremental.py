@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cube import build_cube, rollup, update_cube
+from incremental import SEAT_KEY, merge_delta
+from ingest import read_normalized
+
+
+@pytest.fixture(scope='module')
+def sales():
+    return read_normalized('group_sales1.csv')
+
+
+def make_delta(sales):
+    # Five re-exported seats at a new price, three seats never sold before and
+    # one block with no seat number, which makes the export's seat_num float
+    replaced = sales.iloc[[3, 10, 50, 400, 1000]].copy()
+    replaced['block_full_price'] = replaced['block_full_price'].astype('int64') + 7
+    new = sales.iloc[[20, 21, 22]].copy()
+    new['seat_num'] = [201, 202, 203]
+    unseated = sales.iloc[[30]].copy()
+    delta = pd.concat([replaced, new, unseated], ignore_index=True)
+    delta['seat_num'] = delta['seat_num'].astype('float64')
+    delta.loc[len(delta) - 1, 'seat_num'] = np.nan
+    return delta
+
+
+def seat_strings(frame):
+    seats = frame['seat_num'].astype(object).map(str).str.replace(r'\.0$', '', regex=True)
+    return pd.Series(list(zip(*[frame[column].astype(object).map(str) for column in SEAT_KEY[:-1]], seats)))
+
+
+def test_float_seats_match_integer_seats(sales):
+    delta = make_delta(sales)
+    merged, replaced, kept, stats = merge_delta(sales, delta)
+
+    # Reference: the same merge on the seat keys as plain strings, "12.0" read as "12"
+    base_keys, delta_keys = seat_strings(sales), seat_strings(delta)
+    assert stats['replaced'] == base_keys.isin(delta_keys).sum() == 5
+    assert stats['added'] == (~delta_keys.isin(base_keys)).sum() == 4
+    assert len(merged) == len(sales) - 5 + len(delta)
+    assert merged['block_full_price'].sum() == sales['block_full_price'].sum() + 5 * 7 + delta.iloc[5:][
+        'block_full_price'].sum()
+
+
+def test_added_counts_delta_rows_when_base_repeats_a_seat(sales):
+    base = pd.concat([sales, sales.iloc[[3]]], ignore_index=True)
+    _, replaced, _, stats = merge_delta(base, sales.iloc[[3, 20]].assign(seat_num=[sales['seat_num'].iloc[3], 250]))
+    assert stats == {'rows': 2, 'added': 1, 'replaced': 2}
+    assert len(replaced) == 2
+
+
+@pytest.mark.parametrize('by', [['event_name_display'], ['acct_rep_full_name', 'days_difference']])
+def test_update_cube_matches_a_rebuild(sales, by):
+    merged, replaced, delta, _ = merge_delta(sales, make_delta(sales))
+    cube = update_cube(build_cube(sales), replaced, delta)
+    rebuilt = build_cube(merged)
+    for table in ('cells', 'accounts'):
+        keys = [column for column in rebuilt[table].columns if column not in ('block_full_price', 'num_seats', 'rows')]
+        left = cube[table].sort_values(keys).reset_index(drop=True)
+        right = rebuilt[table].sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(left.astype(str), right.astype(str))
+
+    grouped = merged.groupby(by, observed=True)
+    expected = pd.DataFrame({'block_full_price': grouped['block_full_price'].sum(),
+                             'orders': grouped['acct_id'].nunique()}).reset_index().sort_values(by)
+    result = rollup(cube, by).sort_values(by)
+    np.testing.assert_array_equal(result['block_full_price'].to_numpy(np.int64),
+                                  expected['block_full_price'].to_numpy(np.int64))
+    np.testing.assert_array_equal(result['orders'].to_numpy(), expected['orders'].to_numpy())
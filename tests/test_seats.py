@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingest import read_normalized
+from seats import blocks_overlapping, section_heatmap, section_rows, seat_index
+
+
+@pytest.fixture(scope='module')
+def sales():
+    # Some blocks lose their section, row or seat number, as in exports with blank cells
+    data = read_normalized('group_sales1.csv').copy()
+    data['seat_num'] = data['seat_num'].astype('float64')
+    data.loc[[5, 6], 'section_name'] = np.nan
+    data.loc[[7], 'row_name'] = np.nan
+    data.loc[[8], 'seat_num'] = np.nan
+    return data
+
+
+@pytest.fixture(scope='module')
+def index(sales):
+    return seat_index({'data': sales, 'cube': {}})
+
+
+def placed(sales):
+    return sales.dropna(subset=['section_name', 'row_name', 'seat_num'])
+
+
+def test_blocks_with_missing_parts_are_left_out(sales, index):
+    assert index['unplaced'] == 4
+    assert not np.isin([5, 6, 7, 8], index['positions']).any()
+    # Every placed block keeps its own section and row, none is filed under a neighbour's
+    frame = sales.iloc[index['positions']]
+    assert (index['sections'][index['group_section']].repeat(np.diff(np.r_[index['offsets'], len(frame)]))
+            == frame['section_name'].astype(str).to_numpy()).all()
+    assert (index['rows'][index['group_row']].repeat(np.diff(np.r_[index['offsets'], len(frame)]))
+            == frame['row_name'].astype(str).to_numpy()).all()
+
+
+def test_overlap_queries_match_a_scan(sales, index):
+    blocks = placed(sales)
+    rng = np.random.default_rng(7)
+    for position in rng.choice(len(blocks), 40, replace=False):
+        block = blocks.iloc[position]
+        first = int(rng.integers(1, 30))
+        last = first + int(rng.integers(0, 10))
+        expected = np.flatnonzero(
+            (sales['event_name_display'] == block['event_name_display']).to_numpy()
+            & (sales['section_name'] == block['section_name']).to_numpy()
+            & (sales['row_name'] == block['row_name']).to_numpy()
+            & (sales['seat_num'] <= last).to_numpy() & (sales['last_seat'] >= first).to_numpy())
+        found = blocks_overlapping(index, block['event_name_display'], block['section_name'], block['row_name'],
+                                   first, last)
+        assert sorted(found) == expected.tolist()
+    assert len(blocks_overlapping(index, 'No such game', '1', 'A', 1, 10)) == 0
+
+
+@pytest.mark.parametrize('min_days_out', [0, 10])
+def test_section_rows_match_groupby(sales, index, min_days_out):
+    blocks = placed(sales)
+    event = blocks['event_name_display'].value_counts().index[0]
+    result = section_rows(index, event, min_days_out).set_index(['Section', 'Row']).sort_index()
+
+    booked = blocks[(blocks['event_name_display'] == event) & (blocks['days_difference'] >= min_days_out)]
+    booked = booked.assign(seats=booked['last_seat'].astype('int64') - booked['seat_num'].astype('int64') + 1,
+                           Section=booked['section_name'].astype(str), Row=booked['row_name'].astype(str))
+    expected = booked.groupby(['Section', 'Row'])[['seats', 'block_full_price']].sum().sort_index()
+    capacity = blocks.assign(Section=blocks['section_name'].astype(str), Row=blocks['row_name'].astype(str)) \
+        .groupby(['Section', 'Row'])['last_seat'].max()
+
+    assert result.index.tolist() == expected.index.tolist()
+    np.testing.assert_array_equal(result['Seats Sold'], expected['seats'])
+    np.testing.assert_allclose(result['Sales'], expected['block_full_price'])
+    np.testing.assert_array_equal(result['Row Seats'], capacity.loc[expected.index])
+
+
+def test_section_heatmap_matches_groupby(sales, index):
+    blocks = placed(sales)
+    blocks = blocks.assign(seats=blocks['last_seat'].astype('int64') - blocks['seat_num'].astype('int64') + 1)
+    expected = blocks.groupby([blocks['event_name_display'].astype(str), blocks['section_name'].astype(str)])[
+        'seats'].sum()
+    result = section_heatmap(index).set_index(['Game', 'Section'])['Seats Sold']
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
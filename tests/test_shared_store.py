@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from shared_store import SharedFrame, attach, publish
+
+
+@pytest.fixture
+def shared(tmp_path):
+    data = pd.DataFrame({'acct_id': [1, 2, 2], 'num_seats': [4.0, None, 10.0]})
+    cube = {'cells': pd.DataFrame({'rows': [1, 2]}), 'accounts': pd.DataFrame({'acct_id': [1, 2]})}
+    dataset = {'version': 'v1', 'source': 'sales.csv', 'base_key': 'base', 'deltas': [], 'delta_reports': [],
+               'data': data, 'cube': cube, 'report': {'columns': pd.DataFrame({'name': ['acct_id']})}}
+    publish(dataset, shared_dir=str(tmp_path))
+    return attach('v1', shared_dir=str(tmp_path))
+
+
+@pytest.mark.parametrize('modify', [
+    lambda frame: frame.__setitem__('extra', 1),
+    lambda frame: frame.drop(columns='num_seats', inplace=True),
+    lambda frame: frame.rename(columns={'num_seats': 'seats'}, inplace=True),
+    lambda frame: frame.fillna(0, inplace=True),
+    lambda frame: frame.replace(4.0, 5.0, inplace=True),
+    lambda frame: frame.sort_values('num_seats', inplace=True),
+    lambda frame: frame.set_index('acct_id', inplace=True),
+    lambda frame: frame.reset_index(inplace=True),
+    lambda frame: setattr(frame, 'columns', ['a', 'b']),
+])
+def test_shared_frames_refuse_inplace_changes(shared, modify):
+    frame = shared['data']
+    assert isinstance(frame, SharedFrame)
+    with pytest.raises((TypeError, ValueError)):
+        modify(frame)
+    assert list(frame.columns) == ['acct_id', 'num_seats']
+    assert frame['num_seats'].isna().sum() == 1
+
+
+def test_derived_frames_are_private(shared):
+    frame = shared['data']
+    renamed = frame.rename(columns={'num_seats': 'seats'})
+    renamed['extra'] = 1
+    assert type(renamed) is pd.DataFrame
+    assert type(frame.copy()) is pd.DataFrame
+    assert list(frame.columns) == ['acct_id', 'num_seats']
@@ -0,0 +1,35 @@
+import os
+
+import snapshot_cache
+from snapshot_cache import file_fingerprint, remove_stale_snapshots, snapshot_path
+
+
+def test_fingerprint_follows_content(tmp_path):
+    source = tmp_path / 'sales.csv'
+    source.write_text('a\n1\n')
+    first = file_fingerprint(source)
+    assert file_fingerprint(source) == first
+    source.write_text('a\n2\n')
+    assert file_fingerprint(source)['sha256'] != first['sha256']
+
+
+def test_content_hashes_stay_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_cache, 'CONTENT_HASH_ENTRIES', 3)
+    for number in range(10):
+        source = tmp_path / f'delta-{number}.csv'
+        source.write_text(str(number))
+        file_fingerprint(source)
+    assert len(snapshot_cache._content_hashes) <= 3
+    assert str(tmp_path / 'delta-9.csv') in snapshot_cache._content_hashes
+
+
+def test_remove_stale_snapshots_keeps_other_sources(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    here, there = tmp_path / 'a' / 'sales.csv', tmp_path / 'b' / 'sales.csv'
+    names = [snapshot_path(here, 'old', cache_dir), snapshot_path(here, 'new', cache_dir),
+             snapshot_path(here, 'new-merged', cache_dir), snapshot_path(there, 'old', cache_dir)]
+    for name in names:
+        open(name, 'w').close()
+    remove_stale_snapshots(here, 'new', cache_dir)
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(name) for name in names[1:])
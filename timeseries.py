@@ -0,0 +1,117 @@
+"""Sales, orders and tickets for every rep on one shared date axis.
+
+The cube's cells are scattered once into (rep x day) NumPy arrays indexed by
+integer day ordinals, so one rep's series is a row slice and comparing all
+reps is the whole array. Weekly and monthly series are summed from the
+daily arrays. Distinct counts don't add across days, so orders are
+re-counted per bucket from the cube's distinct accounts, or estimated per
+bucket with HyperLogLog.
+"""
+
+import numpy as np
+import pandas as pd
+
+from hyperloglog import group_estimates, precision_for_error
+
+# Selectable resolutions and their pandas period codes
+RESOLUTIONS = {'Daily': 'D', 'Weekly': 'W', 'Monthly': 'M'}
+
+SERIES_MEASURES = ['block_full_price', 'num_seats', 'rows']
+
+
+def _day_ordinals(dates):
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _scatter(flat, weights, shape):
+    summed = np.bincount(flat, weights=weights, minlength=shape[0] * shape[1])
+    if weights.dtype.kind in 'iu':
+        summed = summed.round().astype(np.int64)
+    return summed.reshape(shape)
+
+
+def rep_days(cube):
+    """Daily measures for every rep as (reps x days) arrays, cached on the cube."""
+    days_index = cube.get('rep_days')
+    if days_index is not None:
+        return days_index
+
+    cells = cube['cells']
+    reps = pd.Index(sorted(cells['acct_rep_full_name'].astype(str).unique()))
+    cell_reps = reps.get_indexer(cells['acct_rep_full_name'].astype(str))
+    cell_days = _day_ordinals(cells['add_date'])
+    first_day = int(cell_days.min()) if len(cell_days) else 0
+    n_days = int(cell_days.max()) - first_day + 1 if len(cell_days) else 0
+    cell_days = cell_days - first_day
+
+    flat = cell_reps * n_days + cell_days
+    measures = {measure: _scatter(flat, cells[measure].to_numpy(), (len(reps), n_days))
+                for measure in SERIES_MEASURES}
+
+    # Distinct accounts per (rep, day), kept for re-counting orders per bucket
+    accounts = cube['accounts']
+    account_codes, account_ids = pd.factorize(accounts['acct_id'])
+
+    days_index = cube['rep_days'] = {
+        'reps': reps,
+        'first_day': first_day,
+        'n_days': n_days,
+        'measures': measures,
+        'account_reps': reps.get_indexer(accounts['acct_rep_full_name'].astype(str)),
+        'account_days': _day_ordinals(accounts['add_date']) - first_day,
+        'account_codes': account_codes,
+        'account_ids': accounts['acct_id'].to_numpy(),
+        'n_accounts': len(account_ids),
+        'views': {},
+    }
+    return days_index
+
+
+def _buckets(days_index, resolution):
+    # Bucket code for every day on the axis, and each bucket's start date
+    dates = pd.to_datetime(days_index['first_day'] + np.arange(days_index['n_days']), unit='D')
+    if resolution == 'Daily':
+        return np.arange(len(dates)), dates
+    codes, periods = pd.factorize(dates.to_period(RESOLUTIONS[resolution]))
+    return codes, periods.to_timestamp()
+
+
+def _orders(cube, days_index, day_buckets, n_buckets, approx_error):
+    n_groups = len(days_index['reps']) * n_buckets
+    groups = days_index['account_reps'] * n_buckets + day_buckets[days_index['account_days']]
+    if approx_error:
+        counts = group_estimates(groups, days_index['account_ids'], n_groups, precision_for_error(approx_error)).round()
+    else:
+        # One entry per distinct (rep, bucket, account)
+        pairs = np.unique(groups.astype(np.int64) * days_index['n_accounts'] + days_index['account_codes'])
+        counts = np.bincount(pairs // days_index['n_accounts'], minlength=n_groups)
+    return counts.astype(np.int64).reshape(len(days_index['reps']), n_buckets)
+
+
+def rep_series(cube, resolution='Daily', approx_error=None):
+    """Every rep's measures at ``resolution`` over the cube's full date range.
+
+    Returns a dict with ``reps`` and ``dates`` (each bucket's start) plus
+    block_full_price, num_seats, rows and orders arrays of shape
+    (reps x buckets). Results are cached on the cube per resolution and
+    order-count mode.
+    """
+    days_index = rep_days(cube)
+    view_key = (resolution, approx_error)
+    series = days_index['views'].get(view_key)
+    if series is not None:
+        return series
+
+    day_buckets, dates = _buckets(days_index, resolution)
+    series = {'reps': days_index['reps'], 'dates': dates}
+    if resolution == 'Daily' or not len(dates):
+        series.update(days_index['measures'])
+    else:
+        # Buckets are contiguous runs of days, so sum each run of columns
+        starts = np.flatnonzero(np.r_[True, day_buckets[1:] != day_buckets[:-1]])
+        series.update({measure: np.add.reduceat(values, starts, axis=1)
+                       for measure, values in days_index['measures'].items()})
+    series['orders'] = _orders(cube, days_index, day_buckets, len(dates), approx_error)
+
+    days_index['views'][view_key] = series
+    return series